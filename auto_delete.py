@@ -0,0 +1,128 @@
+# Persistent auto-delete scheduler.
+#
+# Delivered messages are tracked as compact (due_at, chat_id, message_id)
+# tuples in a single heap instead of one sleeping task per message. Entries are
+# persisted to MongoDB so pending deletions survive restarts, and due messages
+# are removed per chat with delete_messages() in chunks of up to 100 ids.
+
+import asyncio
+import heapq
+import time
+from collections import defaultdict
+from pyrogram.errors import FloodWait
+from config import AUTO_DELETE_DELAY, LOGGER
+from database.deletions import add_deletions, remove_deletions, iter_deletions
+
+logger = LOGGER(__name__)
+
+DELETE_BATCH_SIZE = 100  # Telegram's limit for a single delete_messages call
+
+
+class AutoDeleteScheduler:
+
+    def __init__(self, flush_interval=1.0):
+        self.flush_interval = flush_interval
+        self._heap = []
+        self._unsaved = []
+        self._wakeup = asyncio.Event()
+        self._client = None
+        self._task = None
+
+    def __len__(self):
+        return len(self._heap)
+
+    def schedule(self, chat_id, message_ids, delay=AUTO_DELETE_DELAY):
+        """Queues message_ids in chat_id for deletion after delay seconds."""
+
+        if isinstance(message_ids, int):
+            message_ids = [message_ids]
+        due_at = time.time() + delay
+        earliest = self._heap[0][0] if self._heap else None
+        for message_id in message_ids:
+            entry = (due_at, chat_id, message_id)
+            heapq.heappush(self._heap, entry)
+            self._unsaved.append(entry)
+        if earliest is None or due_at < earliest or len(self._unsaved) == len(message_ids):
+            self._wakeup.set()
+
+    async def start(self, client):
+        self._client = client
+        loaded = 0
+        try:
+            async for entry in iter_deletions():
+                self._heap.append(entry)
+                loaded += 1
+        except Exception as e:
+            logger.error(f"Could not load pending deletions: {e}")
+        heapq.heapify(self._heap)
+        if loaded:
+            logger.info(f"Restored {loaded} pending auto-deletions.")
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self._save()
+
+    async def _save(self):
+        if not self._unsaved:
+            return
+        entries, self._unsaved = self._unsaved, []
+        try:
+            await add_deletions(entries)
+        except Exception as e:
+            logger.error(f"Could not persist {len(entries)} scheduled deletions: {e}")
+
+    async def _run(self):
+        while True:
+            try:
+                await self._save()
+
+                now = time.time()
+                due = defaultdict(list)
+                while self._heap and self._heap[0][0] <= now:
+                    _, chat_id, message_id = heapq.heappop(self._heap)
+                    due[chat_id].append(message_id)
+                for chat_id, message_ids in due.items():
+                    await self._delete(chat_id, message_ids)
+
+                timeout = self._heap[0][0] - time.time() if self._heap else None
+                if self._unsaved:
+                    timeout = self.flush_interval if timeout is None else min(timeout, self.flush_interval)
+                self._wakeup.clear()
+                if timeout is None or timeout > 0:
+                    try:
+                        await asyncio.wait_for(self._wakeup.wait(), timeout)
+                    except asyncio.TimeoutError:
+                        pass
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Auto-delete loop error: {e}")
+                await asyncio.sleep(self.flush_interval)
+
+    async def _delete(self, chat_id, message_ids):
+        for i in range(0, len(message_ids), DELETE_BATCH_SIZE):
+            chunk = message_ids[i:i + DELETE_BATCH_SIZE]
+            try:
+                await self._client.delete_messages(chat_id, chunk)
+            except FloodWait as e:
+                await asyncio.sleep(e.value)
+                try:
+                    await self._client.delete_messages(chat_id, chunk)
+                except Exception as e:
+                    logger.error(f"Failed to delete messages in {chat_id}: {e}")
+            except Exception as e:
+                logger.error(f"Failed to delete messages in {chat_id}: {e}")
+            try:
+                await remove_deletions(chat_id, chunk)
+            except Exception as e:
+                logger.error(f"Could not clear deletions for {chat_id}: {e}")
+
+
+auto_delete = AutoDeleteScheduler()
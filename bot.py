@@ -6,9 +6,17 @@ import pyromod.listen
 from pyrogram import Client
 from pyrogram.enums import ParseMode
 import sys
+import asyncio
 from datetime import datetime
 from config import API_HASH, APP_ID, LOGGER, TG_BOT_TOKEN, TG_BOT_WORKERS, FORCE_SUB_CHANNEL, FORCE_SUB_CHANNEL2, FORCE_SUB_CHANNEL3, FORCE_SUB_CHANNEL4, CHANNEL_ID, PORT
 import pyrogram.utils
+from auto_delete import auto_delete
+from shortener import shortener
+from helper_func import membership_index
+from database.database import seed_verification_totals, setup_verification_logs, start_verification_flusher, stop_verification_flusher
+from database.indexes import ensure_indexes
+from popularity import link_popularity
+from broadcast import broadcaster
 
 pyrogram.utils.MIN_CHAT_ID = -999999999999
 pyrogram.utils.MIN_CHANNEL_ID = -100999999999999
@@ -115,7 +123,25 @@ class Bot(Client):
         bind_address = "0.0.0.0"
         await web.TCPSite(app, bind_address, PORT).start()
 
+        await setup_verification_logs()
+        asyncio.create_task(ensure_indexes())
+        # Seed before the flusher writes its first rollup, the seed only runs while "total" is absent
+        await seed_verification_totals()
+        start_verification_flusher()
+        await auto_delete.start(self)
+        await membership_index.load()
+        await link_popularity.start(self)
+        if not shortener.providers:
+            self.LOGGER(__name__).warning("No shortener configured (SHORTLINK_PROVIDERS / SHORTLINK_URL), verification links will be sent unshortened.")
+        # A broadcast interrupted by a restart carries on, a paused one waits for /resumebroadcast
+        await broadcaster.resume(self, include_paused=False)
+
     async def stop(self, *args):
+        await auto_delete.stop()
+        await link_popularity.stop()
+        await broadcaster.stop()
+        await stop_verification_flusher()
+        await shortener.close()
         await super().stop()
         self.LOGGER(__name__).info("Bot stopped , https://t.me/ultroid_official.")
 
@@ -0,0 +1,237 @@
+# Resumable broadcast engine.
+#
+# User ids are streamed in ascending order to a pool of workers that copy the
+# broadcast message through the shared send scheduler, so the global and
+# per-chat rate limits (and FloodWait handling) apply to every send. Progress
+# is checkpointed to MongoDB as the highest id below which every user has
+# been handled; after a crash or restart the broadcast continues from there.
+# Users who blocked the bot or deleted their account are removed in batches.
+# Users between the checkpoint and a crash may get the message twice.
+
+import asyncio
+from collections import deque
+from pyrogram.errors import UserIsBlocked, InputUserDeactivated
+from config import LOGGER, BROADCAST_WORKERS, BROADCAST_PROGRESS_INTERVAL
+from database.database import iter_user_ids, del_users
+from database.broadcasts import create_broadcast, save_broadcast, get_active_broadcast
+from ratelimit import send_scheduler
+
+logger = LOGGER(__name__)
+
+REMOVE_BATCH_SIZE = 500
+
+
+class BroadcastError(Exception):
+    pass
+
+
+class BroadcastEngine:
+
+    def __init__(self, workers=BROADCAST_WORKERS, progress_interval=BROADCAST_PROGRESS_INTERVAL):
+        self.workers = workers
+        self.progress_interval = progress_interval
+        self.state = None
+        self._task = None
+        self._client = None
+        self._unpaused = asyncio.Event()
+        self._unpaused.set()
+        self._removed = []
+        self._dispatched = deque()
+        self._done = set()
+
+    @property
+    def running(self):
+        return self._task is not None and not self._task.done()
+
+    async def start(self, client, message, status_message):
+        """Broadcasts a copy of message to every user, reporting progress by
+        editing status_message."""
+
+        if self.running or await get_active_broadcast():
+            raise BroadcastError("A broadcast is already in progress.")
+        self.state = {
+            "from_chat_id": message.chat.id,
+            "message_id": message.id,
+            "chat_id": status_message.chat.id,
+            "status_message_id": status_message.id,
+            "status": "running",
+            "last_id": None,
+            "counts": {"total": 0, "successful": 0, "blocked": 0, "deleted": 0, "unsuccessful": 0}
+        }
+        self.state["_id"] = await create_broadcast(self.state)
+        self._launch(client)
+
+    async def resume(self, client, include_paused=True):
+        """Continues a paused broadcast, or the one interrupted by a restart.
+        Returns False if there is nothing to resume."""
+
+        if self.running:
+            if self._unpaused.is_set():
+                return False
+            self.state["status"] = "running"
+            self._unpaused.set()
+            await self._checkpoint()
+            return True
+
+        state = await get_active_broadcast()
+        if state is None or (not include_paused and state["status"] == "paused"):
+            return False
+        state["status"] = "running"
+        state.pop("error", None)
+        self.state = state
+        logger.info(f"Resuming broadcast {state['_id']} after user {state['last_id']}.")
+        self._launch(client)
+        return True
+
+    async def pause(self):
+        if not self.running or not self._unpaused.is_set():
+            return False
+        self._unpaused.clear()
+        self.state["status"] = "paused"
+        await self._checkpoint()
+        await self._report()
+        return True
+
+    async def cancel(self):
+        if self.running:
+            self.state["status"] = "cancelled"
+            self._unpaused.set()
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            return True
+
+        state = await get_active_broadcast()
+        if state is None:
+            return False
+        await save_broadcast(state["_id"], {"status": "cancelled"})
+        return True
+
+    async def stop(self):
+        # Leaves the broadcast "running" in MongoDB so the next start resumes it
+        if self.running:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    def _launch(self, client):
+        self._client = client
+        self._unpaused.set()
+        self._removed = []
+        self._dispatched = deque()
+        self._done = set()
+        self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        queue = asyncio.Queue(maxsize=self.workers * 2)
+
+        async def produce():
+            async for user_id in iter_user_ids(after=self.state["last_id"]):
+                self._dispatched.append(user_id)
+                await queue.put(user_id)
+            for _ in range(self.workers):
+                await queue.put(None)
+
+        async def work():
+            while True:
+                user_id = await queue.get()
+                if user_id is None:
+                    return
+                await self._unpaused.wait()
+                outcome = await self._deliver(user_id)
+                self.state["counts"]["total"] += 1
+                self.state["counts"][outcome] += 1
+                self._done.add(user_id)
+                if len(self._removed) >= REMOVE_BATCH_SIZE:
+                    await self._flush_removed()
+
+        reporter = asyncio.create_task(self._report_loop())
+        tasks = [asyncio.create_task(produce())] + [asyncio.create_task(work()) for _ in range(self.workers)]
+        try:
+            await asyncio.gather(*tasks)
+            self.state["status"] = "done"
+            logger.info(f"Broadcast {self.state['_id']} finished: {self.state['counts']}")
+        except Exception as e:
+            # Paused rather than left "running", so /resumebroadcast continues from the checkpoint
+            self.state["status"] = "paused"
+            self.state["error"] = str(e)
+            logger.error(f"Broadcast {self.state['_id']} stopped: {e}")
+        finally:
+            reporter.cancel()
+            # gather doesn't cancel the others when one fails, workers would wait on the queue forever
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            await self._flush_removed()
+            await self._checkpoint()
+            await self._report()
+
+    async def _deliver(self, user_id):
+        try:
+            await send_scheduler.send(
+                user_id, self._client.copy_message, user_id, self.state["from_chat_id"], self.state["message_id"]
+            )
+            return "successful"
+        except UserIsBlocked:
+            self._removed.append(user_id)
+            return "blocked"
+        except InputUserDeactivated:
+            self._removed.append(user_id)
+            return "deleted"
+        except Exception as e:
+            logger.debug(f"Broadcast to {user_id} failed: {e}")
+            return "unsuccessful"
+
+    async def _flush_removed(self):
+        if not self._removed:
+            return
+        removed, self._removed = self._removed, []
+        try:
+            await del_users(removed)
+        except Exception as e:
+            logger.error(f"Could not remove {len(removed)} inactive users: {e}")
+
+    async def _checkpoint(self):
+        # Advance last_id over the longest prefix of handled ids
+        while self._dispatched and self._dispatched[0] in self._done:
+            self.state["last_id"] = self._dispatched.popleft()
+            self._done.discard(self.state["last_id"])
+        try:
+            await save_broadcast(self.state["_id"], self.state)
+        except Exception as e:
+            logger.error(f"Could not checkpoint broadcast {self.state['_id']}: {e}")
+
+    async def _report_loop(self):
+        while True:
+            await asyncio.sleep(self.progress_interval)
+            await self._checkpoint()
+            await self._report()
+
+    async def _report(self):
+        counts = self.state["counts"]
+        title = {
+            "running": "Broadcasting Message..",
+            "paused": "Broadcast Paused",
+            "cancelled": "Broadcast Cancelled",
+            "done": "Broadcast Completed"
+        }[self.state["status"]]
+        text = f"""<b><u>{title}</u>
+
+Total Users: <code>{counts['total']}</code>
+Successful: <code>{counts['successful']}</code>
+Blocked Users: <code>{counts['blocked']}</code>
+Deleted Accounts: <code>{counts['deleted']}</code>
+Unsuccessful: <code>{counts['unsuccessful']}</code></b>"""
+        if self.state["status"] == "paused" and self.state.get("error"):
+            text += f"\n\nStopped by an error: <code>{self.state['error']}</code>\nUse /resumebroadcast to continue."
+        try:
+            await self._client.edit_message_text(self.state["chat_id"], self.state["status_message_id"], text)
+        except Exception as e:
+            logger.debug(f"Could not update broadcast progress: {e}")
+
+
+broadcaster = BroadcastEngine()
@@ -3,6 +3,7 @@
 
 
 import os
+import hashlib
 import logging
 from logging.handlers import RotatingFileHandler
 
@@ -14,6 +15,25 @@ LIMIT_INCREASE_AMOUNT = 10  # Amount by which the limit is increased after verif
 START_COMMAND_LIMIT = 15  # Default limit for new users
 AUTO_DELETE_DELAY = 600 
 
+SEND_RATE_GLOBAL = float(os.environ.get("SEND_RATE_GLOBAL", "25"))  # Messages per second across all chats
+SEND_RATE_PER_CHAT = float(os.environ.get("SEND_RATE_PER_CHAT", "2"))  # Starting messages per second to one chat
+SEND_BURST_PER_CHAT = int(os.environ.get("SEND_BURST_PER_CHAT", "5"))  # Messages a chat can receive back to back
+BROADCAST_WORKERS = int(os.environ.get("BROADCAST_WORKERS", "20"))  # Concurrent senders during a broadcast
+BROADCAST_PROGRESS_INTERVAL = int(os.environ.get("BROADCAST_PROGRESS_INTERVAL", "20"))  # Seconds between broadcast checkpoints and progress edits
+
+USER_CACHE_SIZE = int(os.environ.get("USER_CACHE_SIZE", "10000"))  # Max user documents kept in memory
+USER_CACHE_TTL = int(os.environ.get("USER_CACHE_TTL", "300"))  # Seconds before a cached user is re-read
+FETCH_CONCURRENCY = int(os.environ.get("FETCH_CONCURRENCY", "4"))  # Parallel get_messages chunks per request
+FETCH_RETRIES = int(os.environ.get("FETCH_RETRIES", "3"))  # Retries per chunk on FloodWait or network errors
+PIPELINE_DEPTH = int(os.environ.get("PIPELINE_DEPTH", "2"))  # Chunks of a batch link resolved ahead of sending
+MANIFEST_CACHE_SIZE = int(os.environ.get("MANIFEST_CACHE_SIZE", "1000"))  # Hot link manifests kept in memory
+MANIFEST_CACHE_BYTES = int(os.environ.get("MANIFEST_CACHE_BYTES", str(64 * 1024 * 1024)))  # Memory budget for cached link manifests
+MESSAGE_CACHE_BYTES = int(os.environ.get("MESSAGE_CACHE_BYTES", str(32 * 1024 * 1024)))  # Memory budget for cached DB channel posts
+POPULARITY_FLUSH_INTERVAL = int(os.environ.get("POPULARITY_FLUSH_INTERVAL", "60"))  # Seconds between link hit counter flushes
+VERIFICATION_LOG_TTL = int(os.environ.get("VERIFICATION_LOG_TTL", "86400"))  # Seconds before MongoDB expires a verification log entry
+VERIFICATION_FLUSH_INTERVAL = float(os.environ.get("VERIFICATION_FLUSH_INTERVAL", "0.3"))  # Seconds between batched verification log writes
+PREWARM_TOP_LINKS = int(os.environ.get("PREWARM_TOP_LINKS", "20"))  # Trending links whose posts are kept warm in the caches
+
 TG_BOT_TOKEN = os.environ.get("TG_BOT_TOKEN", "44702697:AAHeIQzJGiO1ud5EbM8pqNOxqUAPx3NI")
 APP_ID = int(os.environ.get("APP_ID", "22505271"))
 API_HASH = os.environ.get("API_HASH", "c89a94fcfda4bc06524d0903977fc81e")
@@ -46,15 +66,29 @@ DB_URI = os.environ.get("DATABASE_URL", "mongodb+srv://ultroidxTeam:ultroidxTeam
 DB_NAME = os.environ.get("DATABASE_NAME", "Cluser10")
 
 CHANNEL_ID = int(os.environ.get("CHANNEL_ID", "-1002075726565")) #database save channel id 
+# Key used to sign file links, derived from the bot token unless set. Keep it stable: changing it (or the token it is derived from) breaks every shared link.
+LINK_SECRET = os.environ.get("LINK_SECRET") or hashlib.sha256(f"links:{TG_BOT_TOKEN}".encode()).hexdigest()
+# Key used to sign verification tokens, derived from the bot token unless set. Changing it invalidates pending verification links.
+VERIFY_SECRET = os.environ.get("VERIFY_SECRET") or hashlib.sha256(f"verify:{TG_BOT_TOKEN}".encode()).hexdigest()
+VERIFY_TOKEN_TTL = int(os.environ.get("VERIFY_TOKEN_TTL", "86400"))  # Minimum seconds a verification link stays valid
+VERIFY_TOKEN_WINDOW = int(os.environ.get("VERIFY_TOKEN_WINDOW", "3600"))  # A user gets the same verification link for this long
 FORCE_SUB_CHANNEL = int(os.environ.get("FORCE_SUB_CHANNEL", "0"))
 FORCE_SUB_CHANNEL2 = int(os.environ.get("FORCE_SUB_CHANNEL2", "0"))
 FORCE_SUB_CHANNEL3 = int(os.environ.get("FORCE_SUB_CHANNEL3", "0"))
 FORCE_SUB_CHANNEL4 = int(os.environ.get("FORCE_SUB_CHANNEL4", "0"))
 
+MEMBERSHIP_CACHE_SIZE = int(os.environ.get("MEMBERSHIP_CACHE_SIZE", "100000"))  # Failed (user, channel) checks kept in memory
+MEMBERSHIP_CACHE_TTL = int(os.environ.get("MEMBERSHIP_CACHE_TTL", "600"))  # Seconds a known membership is trusted before it's checked again
+MEMBERSHIP_NEGATIVE_TTL = int(os.environ.get("MEMBERSHIP_NEGATIVE_TTL", "5"))  # Seconds a failed check is remembered
+
 #Shortner (token system) 
 
 SHORTLINK_URL = os.environ.get("SHORTLINK_URL", "api.shareus.io") 
 SHORTLINK_API = os.environ.get("SHORTLINK_API", "PUIAQBIFrydvLhIzAOeGV8yZppu2")
+# Shorteners tried in order, space separated "site|api_key" pairs ("local" is an offline stand-in)
+SHORTLINK_PROVIDERS = os.environ.get("SHORTLINK_PROVIDERS") or f"{SHORTLINK_URL}|{SHORTLINK_API}"
+SHORTLINK_TIMEOUT = float(os.environ.get("SHORTLINK_TIMEOUT", "5"))  # Hard deadline for one short link, in seconds
+SHORTLINK_HEDGE_PERCENTILE = int(os.environ.get("SHORTLINK_HEDGE_PERCENTILE", "95"))  # Latency percentile after which the next provider is tried
 VERIFY_EXPIRE = int(os.environ.get('VERIFY_EXPIRE', 86400)) # Add time in seconds
 IS_VERIFY = os.environ.get("IS_VERIFY", "True")
 TUT_VID = os.environ.get("TUT_VID", "https://t.me/Ultroid_Official/18")
@@ -82,6 +116,9 @@ PROTECT_CONTENT = True if os.environ.get('PROTECT_CONTENT', "False") == "True" e
 
 DISABLE_CHANNEL_BUTTON = os.environ.get("DISABLE_CHANNEL_BUTTON", None) == 'True'
 
+# Deliver batch links as albums (up to 10 files per message group). Albums can't carry the share button.
+ALBUM_DELIVERY = os.environ.get("ALBUM_DELIVERY", "False") == "True"
+
 BOT_STATS_TEXT = "<b>BOT UPTIME</b>\n{uptime}"
 USER_REPLY_TEXT = "❌Don't send me messages directly I'm only File Share bot !"
 
@@ -0,0 +1,33 @@
+# database/broadcasts.py
+
+from datetime import datetime
+from database.database import db, logger
+from database.indexes import register_indexes, register_query
+
+# One document per broadcast: the message to copy, where progress is shown,
+# counters and the checkpoint (every user id <= last_id has been handled)
+broadcast_collection = db['broadcasts']
+
+ACTIVE_STATUSES = ["running", "paused"]
+
+register_indexes(broadcast_collection, [("status", 1), ("started_at", -1)])
+register_query("active broadcast", broadcast_collection, {"status": {"$in": ACTIVE_STATUSES}}, [("started_at", -1)])
+
+
+async def create_broadcast(state):
+
+    state["started_at"] = state["updated_at"] = datetime.utcnow()
+    result = await broadcast_collection.insert_one(state)
+    logger.info(f"Started broadcast {result.inserted_id}.")
+    return result.inserted_id
+
+async def save_broadcast(broadcast_id, state):
+
+    update = {key: value for key, value in state.items() if key != "_id"}
+    update["updated_at"] = datetime.utcnow()
+    await broadcast_collection.update_one({"_id": broadcast_id}, {"$set": update})
+
+async def get_active_broadcast():
+    """Returns the latest running or paused broadcast, or None."""
+
+    return await broadcast_collection.find_one({"status": {"$in": ACTIVE_STATUSES}}, sort=[("started_at", -1)])
@@ -1,9 +1,14 @@
 # database/database.py
 
 from motor.motor_asyncio import AsyncIOMotorClient
-from config import DB_URI, DB_NAME, START_COMMAND_LIMIT
+from pymongo import ReturnDocument, UpdateOne
+from database.indexes import register_indexes, register_query
+from config import DB_URI, DB_NAME, START_COMMAND_LIMIT, MAX_TOKEN_USES_PER_DAY, CREDIT_INCREMENT, USER_CACHE_SIZE, USER_CACHE_TTL, VERIFY_TOKEN_TTL, VERIFY_TOKEN_WINDOW, VERIFICATION_LOG_TTL, VERIFICATION_FLUSH_INTERVAL
+from collections import Counter, OrderedDict
 from datetime import datetime, timedelta
+import asyncio
 import logging
+import time
 
 # Initialize logging
 logging.basicConfig(level=logging.INFO)
@@ -13,10 +18,23 @@ logger = logging.getLogger(__name__)
 mongo_client = AsyncIOMotorClient(DB_URI)
 db = mongo_client[DB_NAME]
 
+USER_BATCH_SIZE = 1000  # Ids per cursor round trip when streaming users
+SHORTLINK_TTL = VERIFY_TOKEN_TTL + VERIFY_TOKEN_WINDOW  # Longest a verification token, and so its short link, stays valid
+
 # Collections
 phdlust = db['phdlust']
 token_collection = db['tokens']
+shortlink_collection = db['shortlinks']
 verification_log_collection = db['verification_logs']
+verification_stats_collection = db['verification_stats']  # Hourly/daily rollups and the "total" counters
+
+register_indexes(phdlust, [("limit", -1)])
+register_indexes(verification_stats_collection, [("period", 1), ("start", 1)])
+register_indexes(shortlink_collection, ([("created_at", 1)], {"expireAfterSeconds": SHORTLINK_TTL}))
+register_query("credit report", phdlust, {}, [("limit", -1)])
+register_query("verify token redemption", phdlust, {"_id": 0, "previous_token": ""})
+register_query("signed token redemption", phdlust, {"_id": 0, "verify_seq": 0})
+register_query("verification buckets", verification_stats_collection, {"period": "hour", "start": {"$gte": datetime.utcnow()}})
 
 # Default user data structure
 default_user = {
@@ -25,118 +43,511 @@ default_user = {
     "is_premium": False,  # Premium status
     "premium_status": None,  # e.g., Silver, Bronze, Gold
     "token_usage": [],  # List of timestamps when tokens were used to increase credits
-    "verify_token": "",
     "verified_time": 0
 }
 
-async def log_verification(user_id):
+# Premium users are demoted once a deduction leaves them below this many credits
+PREMIUM_MIN_CREDITS = 20
+
+
+class LRUCache:
+    """Bounded in-process cache with least-recently-used eviction and an
+    optional time-to-live per entry. Counts hits, misses and evictions.
+
+    Entries can also be bounded by an approximate byte budget: pass max_bytes
+    together with a sizeof callable returning the cost of a value."""
+
+    def __init__(self, maxsize=1024, ttl=None, max_bytes=None, sizeof=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self.bytes = 0
+        self._data = OrderedDict()  # key -> (expires_at, value, size)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return self.get(key, _MISSING, count=False) is not _MISSING
+
+    def get(self, key, default=None, count=True):
+        entry = self._data.get(key)
+        if entry is not None:
+            expires_at, value, size = entry
+            if expires_at is None or expires_at > time.monotonic():
+                self._data.move_to_end(key)
+                if count:
+                    self.hits += 1
+                return value
+            del self._data[key]
+            self.bytes -= size
+        if count:
+            self.misses += 1
+        return default
+
+    def set(self, key, value, ttl=None):
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.monotonic() + ttl if ttl else None
+        size = self.sizeof(value) if self.sizeof else 0
+        old = self._data.pop(key, None)
+        if old is not None:
+            self.bytes -= old[2]
+        self._data[key] = (expires_at, value, size)
+        self.bytes += size
+        while self._data and (
+            (self.maxsize is not None and len(self._data) > self.maxsize)
+            or (self.max_bytes is not None and self.bytes > self.max_bytes)
+        ):
+            self.bytes -= self._data.popitem(last=False)[1][2]
+            self.evictions += 1
+
+    def pop(self, key, default=None):
+        entry = self._data.pop(key, None)
+        if entry is None:
+            return default
+        self.bytes -= entry[2]
+        return entry[1]
+
+    def keys(self):
+        return list(self._data)
+
+    def clear(self):
+        self._data.clear()
+        self.bytes = 0
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "bytes": self.bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0
+        }
+
+
+_MISSING = object()
+
+# Write-through cache of phdlust documents, keyed by user id
+user_cache = LRUCache(maxsize=USER_CACHE_SIZE, ttl=USER_CACHE_TTL)
+
+def user_cache_stats():
+    return user_cache.stats()
+
+async def find_user(user_id):
+    """Returns the cached user document, reading it from MongoDB on a miss.
+    Unknown users are not registered (use get_user for that)."""
+
+    user = user_cache.get(user_id)
+    if user is None:
+        user = await phdlust.find_one({"_id": user_id})
+        if user is not None:
+            user_cache.set(user_id, user)
+    return user
+
+async def write_user(user_id, update, upsert=False):
+    """Applies an update to a user and refreshes the cached copy with the
+    resulting document. Returns the updated document (None if not found)."""
 
-    await verification_log_collection.insert_one({
-        "user_id": user_id,
-        "timestamp": datetime.utcnow()
-    })
+    user = await phdlust.find_one_and_update(
+        {"_id": user_id},
+        update,
+        upsert=upsert,
+        return_document=ReturnDocument.AFTER
+    )
+    if user is None:
+        user_cache.pop(user_id)
+    else:
+        user_cache.set(user_id, user)
+    return user
+
+async def setup_verification_logs(ttl=VERIFICATION_LOG_TTL):
+    """Makes MongoDB expire verification logs by itself: a time-series
+    collection with expireAfterSeconds where the server supports it, a TTL
+    index on a plain collection otherwise."""
+
+    name = verification_log_collection.name
+    try:
+        result = await db.command("listCollections", filter={"name": name})
+        existing = result["cursor"]["firstBatch"]
+
+        if not existing:
+            try:
+                await db.create_collection(name, timeseries={"timeField": "timestamp", "metaField": "user_id"}, expireAfterSeconds=ttl)
+                logger.info(f"Created time-series collection {name}.")
+                return
+            except Exception as e:
+                logger.warning(f"Time-series collections unavailable, expiring {name} with a TTL index: {e}")
+        elif existing[0].get("type") == "timeseries":
+            if existing[0].get("options", {}).get("expireAfterSeconds") != ttl:
+                try:
+                    await db.command("collMod", name, expireAfterSeconds=ttl)
+                except Exception as e:
+                    logger.error(f"Could not change the expiry of {name}: {e}")
+            return
+    except Exception as e:
+        # Like ensure_indexes, a database hiccup here must not stop the bot
+        logger.error(f"Could not inspect {name}, expiring it with a TTL index: {e}")
+
+    # Plain collection, created by this fallback or by an older version
+    register_indexes(verification_log_collection, ([("timestamp", 1)], {"expireAfterSeconds": ttl}))
+    try:
+        index = (await verification_log_collection.index_information()).get("timestamp_1")
+        if index and index.get("expireAfterSeconds") != ttl:
+            await db.command("collMod", name, index={"keyPattern": {"timestamp": 1}, "expireAfterSeconds": ttl})
+    except Exception as e:
+        logger.error(f"Could not change the TTL index of {name}: {e}")
+
+# Verifications waiting for the next flush: (timestamp, user_id, first_time)
+pending_verifications = []
+verification_flusher = None
+
+async def log_verification(user_id, first_time=False):
+    """Queues a verification. The log entry and the rollup counters are written
+    in batches by flush_verification_logs()."""
+
+    pending_verifications.append((datetime.utcnow(), user_id, first_time))
     logger.info(f"Logged verification for user {user_id}")
 
+async def flush_verification_logs():
+
+    if not pending_verifications:
+        return
+    events = pending_verifications[:]
+    del pending_verifications[:len(events)]
+    try:
+        await verification_log_collection.insert_many(
+            [{"user_id": user_id, "timestamp": when} for when, user_id, _ in events],
+            ordered=False
+        )
+    except Exception as e:
+        logger.error(f"Could not write {len(events)} verification logs: {e}")
+    try:
+        await record_verifications(events)
+    except Exception as e:
+        logger.error(f"Could not update verification counters for {len(events)} verifications: {e}")
+
+async def run_verification_flusher(interval=VERIFICATION_FLUSH_INTERVAL):
+    while True:
+        await asyncio.sleep(interval)
+        await flush_verification_logs()
+
+def start_verification_flusher():
+    global verification_flusher
+    verification_flusher = asyncio.create_task(run_verification_flusher())
+
+async def stop_verification_flusher():
+    if verification_flusher:
+        verification_flusher.cancel()
+        try:
+            await verification_flusher
+        except asyncio.CancelledError:
+            pass
+    await flush_verification_logs()
+
+async def record_verifications(events):
+    """Adds (timestamp, user_id, first_time) events to their hour and day
+    buckets and to the totals, one upsert per touched bucket. first_time also
+    counts the user as a new verifying user."""
+
+    buckets = Counter()
+    totals = Counter()
+    for when, _, first_time in events:
+        hour = when.replace(minute=0, second=0, microsecond=0)
+        buckets[("hour", hour)] += 1
+        buckets[("day", hour.replace(hour=0))] += 1
+        totals["count"] += 1
+        if first_time:
+            totals["users"] += 1
+
+    requests = [
+        UpdateOne(
+            {"_id": f"hour:{start:%Y-%m-%dT%H}" if period == "hour" else f"day:{start:%Y-%m-%d}"},
+            {"$inc": {"count": count}, "$setOnInsert": {"period": period, "start": start}},
+            upsert=True
+        )
+        for (period, start), count in buckets.items()
+    ]
+    requests.append(UpdateOne({"_id": "total"}, {"$inc": dict(totals)}, upsert=True))
+    await verification_stats_collection.bulk_write(requests, ordered=False)
+
 async def get_verification_count(timeframe):
 
     current_time = datetime.utcnow()
+    current_hour = current_time.replace(minute=0, second=0, microsecond=0)
     
     if timeframe == "24h":
-        start_time = current_time - timedelta(hours=24)
+        period, start_time = "hour", current_hour - timedelta(hours=23)
     elif timeframe == "today":
-        start_time = current_time.replace(hour=0, minute=0, second=0, microsecond=0)
+        period, start_time = "day", current_hour.replace(hour=0)
     elif timeframe == "monthly":
-        start_time = current_time.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+        period, start_time = "day", current_hour.replace(day=1, hour=0)
     else:
         logger.warning(f"Invalid timeframe: {timeframe}")
         return 0  # Invalid timeframe
     
-    count = await verification_log_collection.count_documents({
-        "timestamp": {"$gte": start_time, "$lt": current_time}
-    })
+    # At most a month of daily buckets or a day of hourly ones
+    cursor = verification_stats_collection.find({"period": period, "start": {"$gte": start_time}}, {"count": 1})
+    count = sum([doc["count"] async for doc in cursor])
     
     logger.info(f"Verification count for {timeframe}: {count}")
     return count
 
-async def cleanup_old_logs():
+async def get_verification_totals():
+    """Returns (verifications, users who verified at least once) since the start."""
 
-    expiry_time = datetime.utcnow() - timedelta(hours=24)
-    result = await verification_log_collection.delete_many({
-        "timestamp": {"$lt": expiry_time}
-    })
-    logger.info(f"Cleaned up {result.deleted_count} old verification logs.")
+    totals = await verification_stats_collection.find_one({"_id": "total"}) or {}
+    return totals.get("count", 0), totals.get("users", 0)
 
-async def get_previous_token(user_id):
+async def seed_verification_totals():
+    # One-off backfill of the totals from user documents, for data older than the rollups
+    if await verification_stats_collection.find_one({"_id": "total"}, {"_id": 1}):
+        return
+    result = await phdlust.aggregate([
+        {"$match": {"token_use_count": {"$gt": 0}}},
+        {"$group": {"_id": None, "count": {"$sum": "$token_use_count"}, "users": {"$sum": 1}}}
+    ]).to_list(None)
+    count, users = (result[0]["count"], result[0]["users"]) if result else (0, 0)
+    await verification_stats_collection.update_one({"_id": "total"}, {"$inc": {"count": count, "users": users}}, upsert=True)
+    logger.info(f"Seeded verification totals: {count} verifications by {users} users.")
 
-    user = await phdlust.find_one({"_id": user_id})
-    token = user.get("verify_token") if user else None
-    logger.debug(f"Retrieved previous token for user {user_id}: {token}")
-    return token
+async def get_saved_shortlink(token):
 
-async def set_previous_token(user_id, token):
+    doc = await shortlink_collection.find_one({"_id": token})
+    return doc["url"] if doc else None
 
-    await phdlust.update_one(
-        {"_id": user_id},
-        {"$set": {"verify_token": token}},
+async def save_shortlink(token, url):
+
+    await shortlink_collection.update_one(
+        {"_id": token},
+        {"$set": {"url": url, "created_at": datetime.utcnow()}},
         upsert=True
     )
-    logger.info(f"Set new token for user {user_id}: {token}")
+    logger.debug(f"Saved short link for token {token}: {url}")
 
 async def add_user(user_id):
 
     user = default_user.copy()
     user["_id"] = user_id
     await phdlust.insert_one(user)
+    user_cache.set(user_id, user)
     logger.info(f"Added new user with ID: {user_id}")
 
 async def present_user(user_id):
 
-    user = await phdlust.find_one({"_id": user_id})
+    user = await find_user(user_id)
     exists = user is not None
     logger.debug(f"User {user_id} exists: {exists}")
     return exists
 
-async def full_userbase():
+async def open_user_session(user_id):
+    """Registers the user on first sight, spends one credit if any is left and
+    demotes premium users who drop below PREMIUM_MIN_CREDITS, in one round trip.
 
-    user_docs = phdlust.find()
-    user_ids = [doc['_id'] async for doc in user_docs]
-    logger.info(f"Retrieved full user base with {len(user_ids)} users.")
-    return user_ids
+    Returns (user, consumed, demoted) where user is the document as it was
+    before the credit was spent."""
+
+    limit = {"$ifNull": ["$limit", START_COMMAND_LIMIT]}
+    is_premium = {"$ifNull": ["$is_premium", False]}
+    has_credit = {"$gt": [limit, 0]}
+    remaining = {"$subtract": [limit, 1]}
+
+    before = await phdlust.find_one_and_update(
+        {"_id": user_id},
+        [
+            {
+                "$set": {
+                    "limit": {"$cond": [has_credit, remaining, limit]},
+                    "is_premium": {
+                        "$cond": [
+                            {"$and": [is_premium, has_credit, {"$lt": [remaining, PREMIUM_MIN_CREDITS]}]},
+                            False,
+                            is_premium
+                        ]
+                    },
+                    "premium_status": {"$ifNull": ["$premium_status", None]},
+                    "token_use_count": {"$ifNull": ["$token_use_count", 0]},
+                    "last_token_use_time": {"$ifNull": ["$last_token_use_time", None]}
+                }
+            }
+        ],
+        upsert=True,
+        return_document=ReturnDocument.BEFORE
+    )
+
+    if before is None:
+        logger.info(f"Added new user with ID: {user_id}")
+        before = {"_id": user_id}
+    after = dict(before)
+    user = {
+        "_id": user_id,
+        "limit": START_COMMAND_LIMIT if before.get("limit") is None else before["limit"],
+        "is_premium": before.get("is_premium") or False,
+        "premium_status": before.get("premium_status"),
+        "verify_seq": before.get("verify_seq") or 0,
+        "token_use_count": before.get("token_use_count") or 0,
+        "last_token_use_time": before.get("last_token_use_time")
+    }
+
+    consumed = user["limit"] > 0
+    demoted = consumed and user["is_premium"] and user["limit"] - 1 < PREMIUM_MIN_CREDITS
+    if demoted:
+        logger.info(f"Removed premium status from user {user_id} due to low credits.")
+
+    after.update(user)
+    after["limit"] = user["limit"] - 1 if consumed else user["limit"]
+    after["is_premium"] = user["is_premium"] and not demoted
+    user_cache.set(user_id, after)
+    logger.debug(f"Session for user {user_id}: consumed={consumed}, demoted={demoted}")
+    return user, consumed, demoted
+
+async def redeem_verify_token(user_id, token):
+    """Redeems a legacy uuid token stored in previous_token.
+
+    Returns (user, redeemed): user is the document as it was before, or None
+    if the token doesn't belong to the user."""
+
+    return await _redeem({"_id": user_id, "previous_token": token})
+
+async def redeem_signed_token(user_id, nonce):
+    """Redeems an already authenticated signed token (see verifytoken.py). It
+    only matches while the user's verify_seq still equals its nonce, and a
+    successful redemption advances verify_seq, so each token works once.
+
+    Returns (user, redeemed) like redeem_verify_token."""
+
+    seq = nonce if nonce else {"$in": [0, None]}
+    return await _redeem({"_id": user_id, "verify_seq": seq}, {"verify_seq": nonce + 1})
+
+async def _redeem(filter, grant=None, max_uses=MAX_TOKEN_USES_PER_DAY, credits=CREDIT_INCREMENT):
+    # Resets the use count if the last use is over 24 hours old, checks the
+    # cap and grants the credits (plus any grant fields) in one atomic update,
+    # so concurrent taps on the same link can't exceed max_uses
+    grant = grant or {}
+    user_id = filter["_id"]
+
+    # One timestamp for the server-side decision and its replay below
+    now = datetime.now()
+    window = timedelta(hours=24)
+    last_use = {"$ifNull": ["$last_token_use_time", None]}
+    window_expired = {"$or": [{"$eq": [last_use, None]}, {"$gt": [{"$subtract": [now, last_use]}, window.total_seconds() * 1000]}]}
+    uses = {"$cond": [window_expired, 0, {"$ifNull": ["$token_use_count", 0]}]}
+    allowed = {"$lt": [uses, max_uses]}
+
+    before = await phdlust.find_one_and_update(
+        filter,
+        [
+            {
+                "$set": {
+                    "limit": {"$cond": [allowed, {"$add": [{"$ifNull": ["$limit", START_COMMAND_LIMIT]}, credits]}, "$limit"]},
+                    "token_use_count": {"$cond": [allowed, {"$add": [uses, 1]}, "$token_use_count"]},
+                    "last_token_use_time": {"$cond": [allowed, now, "$last_token_use_time"]},
+                    **{field: {"$cond": [allowed, value, f"${field}"]} for field, value in grant.items()}
+                }
+            }
+        ],
+        return_document=ReturnDocument.BEFORE
+    )
+    if before is None:
+        return None, False
+
+    last_token_use_time = before.get("last_token_use_time")
+    uses = 0 if last_token_use_time is None or now - last_token_use_time > window else before.get("token_use_count") or 0
+    redeemed = uses < max_uses
+    if redeemed:
+        after = dict(before)
+        after["limit"] = (START_COMMAND_LIMIT if before.get("limit") is None else before["limit"]) + credits
+        after["token_use_count"] = uses + 1
+        after["last_token_use_time"] = now
+        after.update(grant)
+        user_cache.set(user_id, after)
+    logger.debug(f"Token redemption for user {user_id}: redeemed={redeemed}, uses={uses}")
+    return before, redeemed
+
+async def count_users(exact=False):
+    # The estimate comes from collection metadata and doesn't scan anything
+    if exact:
+        return await phdlust.count_documents({})
+    return await phdlust.estimated_document_count()
+
+async def iter_user_ids(after=None, start=None, end=None, limit=None, batch_size=USER_BATCH_SIZE):
+    """Yields user ids in ascending order without materialising them: only _id
+    is read, batch_size ids per round trip. after (exclusive) resumes a scan,
+    start (inclusive) and end (exclusive) select a partition."""
+
+    bounds = {}
+    if after is not None:
+        bounds["$gt"] = after
+    if start is not None:
+        bounds["$gte"] = start
+    if end is not None:
+        bounds["$lt"] = end
+    cursor = phdlust.find({"_id": bounds} if bounds else {}, {"_id": 1}, batch_size=batch_size).sort("_id", 1)
+    if limit:
+        cursor = cursor.limit(limit)
+    async for doc in cursor:
+        yield doc['_id']
+
+async def get_top_users(limit=10):
+    """The users with the most credits, sorted by the index on limit."""
+
+    cursor = phdlust.find({}, {"_id": 1, "limit": 1}).sort("limit", -1).limit(limit)
+    return await cursor.to_list(length=limit)
+
+async def iter_user_credits(batch_size=USER_BATCH_SIZE):
+    """Yields (user_id, credits) for every user, most credits first."""
+
+    cursor = phdlust.find({}, {"_id": 1, "limit": 1}, batch_size=batch_size).sort("limit", -1)
+    async for doc in cursor:
+        yield doc['_id'], doc.get('limit', 0)
 
 async def del_user(user_id: int):
 
     result = await phdlust.delete_one({'_id': user_id})
+    user_cache.pop(user_id)
     if result.deleted_count:
         logger.info(f"Deleted user with ID: {user_id}")
     else:
         logger.warning(f"Attempted to delete non-existent user with ID: {user_id}")
 
+async def del_users(user_ids):
+
+    if not user_ids:
+        return
+    result = await phdlust.delete_many({'_id': {'$in': list(user_ids)}})
+    for user_id in user_ids:
+        user_cache.pop(user_id)
+    logger.info(f"Deleted {result.deleted_count} of {len(user_ids)} users.")
+
 async def get_user(user_id):
 
-    user = await phdlust.find_one({"_id": user_id})
+    user = await find_user(user_id)
     if user is None:
         await add_user(user_id)
-        user = await phdlust.find_one({"_id": user_id})
+        user = await find_user(user_id)
     logger.debug(f"Retrieved user data for {user_id}: {user}")
     return user
 
 async def update_user(user_id, update_data):
 
-    await phdlust.update_one({"_id": user_id}, {"$set": update_data})
+    await write_user(user_id, {"$set": update_data})
     logger.info(f"Updated user {user_id} with data: {update_data}")
 
 async def increase_user_limit(user_id, credits):
 
-    await phdlust.update_one(
-        {"_id": user_id},
-        {"$inc": {"limit": credits}}
-    )
+    await write_user(user_id, {"$inc": {"limit": credits}})
     logger.info(f"Increased limit for user {user_id} by {credits} credits.")
 
 async def set_premium_status(user_id, status, credits):
 
-    await phdlust.update_one(
-        {"_id": user_id},
+    await write_user(
+        user_id,
         {
             "$set": {
                 "is_premium": True,
@@ -158,10 +569,7 @@ async def can_increase_credits(user_id, credits, time_limit=24):
     recent_usage = [usage for usage in token_usage if usage >= cutoff_time]
     
 
-    await phdlust.update_one(
-        {"_id": user_id},
-        {"$set": {"token_usage": recent_usage}}
-    )
+    await write_user(user_id, {"$set": {"token_usage": recent_usage}})
     
     usage_count = sum([credit for credit in recent_usage])
     
@@ -176,8 +584,8 @@ async def log_token_usage(user_id, credits):
     current_time = datetime.utcnow()
     
 
-    await phdlust.update_one(
-        {"_id": user_id},
+    await write_user(
+        user_id,
         {
             "$push": {
                 "token_usage": {
@@ -193,7 +601,7 @@ async def log_token_usage(user_id, credits):
 
 async def get_token_usage(user_id):
 
-    user = await phdlust.find_one({"_id": user_id})
+    user = await find_user(user_id)
     if user:
         token_usage = user.get("token_usage", [])
         logger.debug(f"Retrieved token usage for user {user_id}: {token_usage}")
@@ -207,8 +615,8 @@ async def remove_premium_if_low(user_id):
 
     user = await get_user(user_id)
     if user["is_premium"] and user["limit"] < 20:
-        await phdlust.update_one(
-            {"_id": user_id},
+        await write_user(
+            user_id,
             {
                 "$set": {
                     "is_premium": False,
@@ -0,0 +1,32 @@
+# database/deletions.py
+
+from database.database import db, logger
+from database.indexes import register_indexes, register_query
+
+# Pending auto-deletions: {"chat_id", "message_id", "due_at" (unix time)}
+deletion_collection = db['auto_delete']
+
+register_indexes(deletion_collection, [("chat_id", 1), ("message_id", 1)])
+register_query("delivered deletions", deletion_collection, {"chat_id": 0, "message_id": {"$in": [0]}})
+
+
+async def add_deletions(entries):
+
+    if not entries:
+        return
+    await deletion_collection.insert_many(
+        [{"chat_id": chat_id, "message_id": message_id, "due_at": due_at} for due_at, chat_id, message_id in entries],
+        ordered=False
+    )
+    logger.debug(f"Persisted {len(entries)} scheduled deletions.")
+
+async def remove_deletions(chat_id, message_ids):
+
+    await deletion_collection.delete_many({"chat_id": chat_id, "message_id": {"$in": list(message_ids)}})
+
+async def iter_deletions(batch_size=1000):
+    """Yields (due_at, chat_id, message_id) for every pending deletion."""
+
+    cursor = deletion_collection.find({}, {"_id": 0, "chat_id": 1, "message_id": 1, "due_at": 1}, batch_size=batch_size)
+    async for doc in cursor:
+        yield doc["due_at"], doc["chat_id"], doc["message_id"]
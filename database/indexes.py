@@ -0,0 +1,94 @@
+# database/indexes.py
+
+import logging
+from pymongo import IndexModel
+
+logger = logging.getLogger(__name__)
+
+# Every database module declares the indexes its queries need, and the hot
+# queries themselves so their plans can be checked with /indexreport
+_indexes = {}
+_queries = []
+
+
+def register_indexes(collection, *keys_and_options):
+    """Declares indexes for collection, each as keys or (keys, options), where
+    keys is a pymongo key list. Index names default to MongoDB's own."""
+
+    models = _indexes.setdefault(collection.name, (collection, []))[1]
+    for spec in keys_and_options:
+        keys, options = spec if isinstance(spec, tuple) else (spec, {})
+        models.append(IndexModel(keys, **{"background": True, **options}))
+
+def register_query(name, collection, filter, sort=None):
+    """Declares a hot query whose plan should use an index."""
+
+    _queries.append((name, collection, filter, sort))
+
+
+def _same_index(declared, existing):
+    if list(declared["key"].items()) != [tuple(key) for key in existing["key"]]:
+        return False
+    options = ("unique", "sparse", "expireAfterSeconds", "partialFilterExpression")
+    return all(declared.get(option) == existing.get(option) for option in options)
+
+async def ensure_indexes():
+    """Creates missing declared indexes and logs drift: indexes whose keys or
+    options differ from their declaration, and indexes nobody declared. Safe
+    to run on every start, existing indexes are left alone."""
+
+    for collection, models in _indexes.values():
+        try:
+            existing = await collection.index_information()
+        except Exception as e:
+            logger.error(f"Could not read indexes of {collection.name}: {e}")
+            continue
+
+        declared = {model.document["name"]: model.document for model in models}
+        missing = [model for model in models if model.document["name"] not in existing]
+        for name, info in existing.items():
+            if name == "_id_":
+                continue
+            if name not in declared:
+                logger.warning(f"Index {collection.name}.{name} {info['key']} is not declared by any module.")
+            elif not _same_index(declared[name], info):
+                logger.warning(f"Index {collection.name}.{name} differs from its declaration, drop it to rebuild: {info}")
+
+        if missing:
+            try:
+                # Builds run server side without blocking reads and writes
+                await collection.create_indexes(missing)
+                logger.info(f"Created indexes on {collection.name}: {[model.document['name'] for model in missing]}")
+            except Exception as e:
+                logger.error(f"Could not create indexes on {collection.name}: {e}")
+
+
+def _plan_stages(plan):
+    # Collects every "stage" in a (classic or slot-based) explain plan tree
+    stages = []
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            stages.append(plan["stage"])
+        for value in plan.values():
+            stages += _plan_stages(value)
+    elif isinstance(plan, list):
+        for value in plan:
+            stages += _plan_stages(value)
+    return stages
+
+async def query_plan_report():
+    """Returns [(query name, collection name, winning plan stages)] for every
+    registered query."""
+
+    report = []
+    for name, collection, filter, sort in _queries:
+        cursor = collection.find(filter)
+        if sort:
+            cursor = cursor.sort(sort)
+        try:
+            explain = await cursor.explain()
+            stages = _plan_stages(explain["queryPlanner"]["winningPlan"])
+        except Exception as e:
+            stages = [f"explain failed: {e}"]
+        report.append((name, collection.name, stages))
+    return report
@@ -0,0 +1,33 @@
+# database/links.py
+
+from datetime import datetime
+from pymongo import UpdateOne, DESCENDING
+from database.database import db, logger
+from database.indexes import register_indexes, register_query
+
+# Lifetime open counts per link payload, flushed in batches from memory
+link_stats_collection = db['link_stats']
+
+register_indexes(link_stats_collection, [("count", DESCENDING)])
+register_query("top links", link_stats_collection, {}, [("count", DESCENDING)])
+
+
+async def add_link_hits(counts):
+    """Adds {payload: hits} to the stored counters in one unordered bulk write."""
+
+    if not counts:
+        return
+    now = datetime.utcnow()
+    await link_stats_collection.bulk_write(
+        [
+            UpdateOne({"_id": payload}, {"$inc": {"count": hits}, "$set": {"last_seen": now}}, upsert=True)
+            for payload, hits in counts.items()
+        ],
+        ordered=False
+    )
+    logger.debug(f"Flushed hit counters for {len(counts)} links.")
+
+async def get_top_links(limit=10):
+
+    cursor = link_stats_collection.find({}, {"count": 1}).sort("count", DESCENDING).limit(limit)
+    return [(doc["_id"], doc["count"]) async for doc in cursor]
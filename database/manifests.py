@@ -0,0 +1,61 @@
+# database/manifests.py
+
+from datetime import datetime
+from pymongo import ReturnDocument
+from database.database import db, logger
+from database.indexes import register_indexes
+
+# Short link ids -> ordered DB channel message ids plus their post records
+manifest_collection = db['manifests']
+counter_collection = db['counters']
+
+# Finds the manifests holding a post when it is edited or deleted
+register_indexes(manifest_collection, [("ids", 1)])
+
+
+async def new_manifest_id():
+
+    counter = await counter_collection.find_one_and_update(
+        {"_id": "manifests"},
+        {"$inc": {"seq": 1}},
+        upsert=True,
+        return_document=ReturnDocument.AFTER
+    )
+    return counter["seq"]
+
+async def save_manifest(manifest_id, message_ids, posts):
+
+    await manifest_collection.replace_one(
+        {"_id": manifest_id},
+        {
+            "_id": manifest_id,
+            "ids": list(message_ids),
+            "posts": posts,
+            "created_at": datetime.utcnow()
+        },
+        upsert=True
+    )
+    logger.info(f"Saved manifest {manifest_id} with {len(posts)} posts.")
+
+async def update_manifest_post(post):
+    """Replaces the stored record of an edited post in every manifest."""
+
+    await manifest_collection.update_many(
+        {"ids": post["id"]},
+        {"$set": {"posts.$[post]": post}},
+        array_filters=[{"post.id": post["id"]}]
+    )
+
+async def remove_manifest_posts(message_ids, deleted=True):
+    """Drops the records of message_ids from every manifest. Deleted posts also
+    leave the id list; otherwise the ids stay and are resolved live."""
+
+    message_ids = list(message_ids)
+    pull = {"posts": {"id": {"$in": message_ids}}}
+    if deleted:
+        pull["ids"] = {"$in": message_ids}
+    await manifest_collection.update_many({"ids": {"$in": message_ids}}, {"$pull": pull})
+
+async def get_manifest(manifest_id):
+
+    return await manifest_collection.find_one({"_id": manifest_id})
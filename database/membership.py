@@ -0,0 +1,39 @@
+# database/membership.py
+
+from datetime import datetime
+from database.database import db, logger
+from database.indexes import register_indexes, register_query
+
+# Force-sub channel members seen through chat_member updates or API checks
+membership_collection = db['memberships']
+
+# Covers iter_members: the scan at startup never reads the documents
+register_indexes(membership_collection, [("channel_id", 1), ("is_member", 1), ("user_id", 1), ("updated_at", 1)])
+register_query("channel members", membership_collection, {"channel_id": {"$in": [0]}, "is_member": True})
+
+
+async def set_membership(channel_id, user_id, is_member):
+
+    await membership_collection.update_one(
+        {"_id": f"{channel_id}:{user_id}"},
+        {"$set": {
+            "channel_id": channel_id,
+            "user_id": user_id,
+            "is_member": is_member,
+            "updated_at": datetime.utcnow()
+        }},
+        upsert=True
+    )
+    logger.debug(f"User {user_id} membership in {channel_id}: {is_member}")
+
+async def iter_members(channel_ids, batch_size=5000):
+    """Yields (channel_id, user_id, updated_at) for every known member of the
+    given channels."""
+
+    cursor = membership_collection.find(
+        {"channel_id": {"$in": list(channel_ids)}, "is_member": True},
+        {"_id": 0, "channel_id": 1, "user_id": 1, "updated_at": 1},
+        batch_size=batch_size
+    )
+    async for doc in cursor:
+        yield doc["channel_id"], doc["user_id"], doc.get("updated_at")
@@ -0,0 +1,44 @@
+# database/posts.py
+
+from pymongo import UpdateOne
+from database.database import db, logger
+
+# DB channel posts reduced to what delivery needs (see helper_func.to_post)
+posts_collection = db['posts']
+
+
+def _to_doc(post):
+    doc = dict(post)
+    doc["_id"] = doc.pop("id")
+    return doc
+
+def _from_doc(doc):
+    post = dict(doc)
+    post["id"] = post.pop("_id")
+    return post
+
+async def save_post(post):
+
+    await posts_collection.replace_one({"_id": post["id"]}, _to_doc(post), upsert=True)
+    logger.debug(f"Saved post {post['id']} to the manifest.")
+
+async def save_posts(posts):
+
+    if not posts:
+        return
+    await posts_collection.bulk_write(
+        [UpdateOne({"_id": post["id"]}, {"$set": _to_doc(post)}, upsert=True) for post in posts],
+        ordered=False
+    )
+    logger.debug(f"Saved {len(posts)} posts to the manifest.")
+
+async def delete_posts(message_ids):
+
+    await posts_collection.delete_many({"_id": {"$in": list(message_ids)}})
+    logger.debug(f"Removed {len(message_ids)} posts from the manifest.")
+
+async def get_saved_posts(message_ids):
+    """Returns {message_id: post} for the ids present in the manifest."""
+
+    cursor = posts_collection.find({"_id": {"$in": list(message_ids)}})
+    return {doc["_id"]: _from_doc(doc) async for doc in cursor}
@@ -3,16 +3,85 @@
 
 import base64
 import re
+import random
 import asyncio
+import time
+from datetime import timezone
+from collections import deque
+from itertools import chain, islice
 from pyrogram import filters
-from pyrogram.enums import ChatMemberStatus
-from config import FORCE_SUB_CHANNEL, FORCE_SUB_CHANNEL2, FORCE_SUB_CHANNEL3, FORCE_SUB_CHANNEL4, ADMINS
+from pyrogram.enums import ChatMemberStatus, ParseMode
+from pyrogram.types import Message, InlineKeyboardMarkup, InlineKeyboardButton, InputMediaPhoto, InputMediaVideo, InputMediaDocument, InputMediaAudio
+from config import FORCE_SUB_CHANNEL, FORCE_SUB_CHANNEL2, FORCE_SUB_CHANNEL3, FORCE_SUB_CHANNEL4, ADMINS, CUSTOM_CAPTION, DISABLE_CHANNEL_BUTTON, PROTECT_CONTENT, MESSAGE_CACHE_BYTES, FETCH_CONCURRENCY, FETCH_RETRIES, PIPELINE_DEPTH, MEMBERSHIP_CACHE_SIZE, MEMBERSHIP_CACHE_TTL, MEMBERSHIP_NEGATIVE_TTL, MANIFEST_CACHE_SIZE, MANIFEST_CACHE_BYTES
 from pyrogram.errors.exceptions.bad_request_400 import UserNotParticipant
 from pyrogram.errors import FloodWait
 from database.database import *
+from database.posts import save_post, save_posts, get_saved_posts, delete_posts
+from database.membership import set_membership, iter_members
+from database.manifests import new_manifest_id, save_manifest, get_manifest, update_manifest_post, remove_manifest_posts
+from linkcodec import encode_link, encode_manifest_link, decode_link, decode_manifest_link
+from shortener import shortener
+from singleflight import SingleFlight
+
+FORCE_SUB_CHANNELS = [channel_id for channel_id in (FORCE_SUB_CHANNEL, FORCE_SUB_CHANNEL2, FORCE_SUB_CHANNEL3, FORCE_SUB_CHANNEL4) if channel_id]
+
+member_status = ChatMemberStatus.OWNER, ChatMemberStatus.ADMINISTRATOR, ChatMemberStatus.MEMBER
+
+# (user_id, channel_id) pairs that recently failed the check. Kept only for
+# MEMBERSHIP_NEGATIVE_TTL so a fresh join is noticed quickly.
+membership_cache = LRUCache(maxsize=MEMBERSHIP_CACHE_SIZE)
+
+
+class MembershipIndex:
+    """Known members per force-sub channel with the time each membership was
+    last confirmed, persisted to MongoDB and kept current from chat_member
+    updates. A membership is trusted for ttl seconds and then checked with
+    Telegram again, so leaves the bot never heard about (downtime, missed
+    updates) are caught. Users who left or were never seen are always checked."""
+
+    def __init__(self, channel_ids, ttl=MEMBERSHIP_CACHE_TTL):
+        self.ttl = ttl
+        self.members = {channel_id: {} for channel_id in channel_ids}
+
+    def is_known(self, channel_id, user_id):
+        return user_id in self.members.get(channel_id, {})
+
+    def is_member(self, channel_id, user_id):
+        confirmed_at = self.members.get(channel_id, {}).get(user_id)
+        return confirmed_at is not None and time.time() - confirmed_at < self.ttl
+
+    async def load(self):
+        count = 0
+        async for channel_id, user_id, updated_at in iter_members(self.members):
+            self.members[channel_id][user_id] = updated_at.replace(tzinfo=timezone.utc).timestamp() if updated_at else 0
+            count += 1
+        logger.info(f"Loaded {count} force-sub memberships.")
+
+    async def update(self, channel_id, user_id, is_member):
+        if channel_id not in self.members:
+            return
+        if is_member:
+            self.members[channel_id][user_id] = time.time()
+            membership_cache.pop((user_id, channel_id))
+        else:
+            self.members[channel_id].pop(user_id, None)
+        try:
+            await set_membership(channel_id, user_id, is_member)
+        except Exception as e:
+            logger.warning(f"Could not persist membership of {user_id} in {channel_id}: {e}")
+
+
+membership_index = MembershipIndex(FORCE_SUB_CHANNELS)
+
+async def check_membership(client, channel_id, user_id):
+    try:
+        member = await client.get_chat_member(chat_id=channel_id, user_id=user_id)
+    except UserNotParticipant:
+        return False
+    return member.status in member_status
 
 async def is_subscribed(filter, client, update):
-    if not (FORCE_SUB_CHANNEL or FORCE_SUB_CHANNEL2 or FORCE_SUB_CHANNEL3 or FORCE_SUB_CHANNEL4):
+    if not FORCE_SUB_CHANNELS:
         return True
 
     user_id = update.from_user.id
@@ -20,21 +89,26 @@ async def is_subscribed(filter, client, update):
     if user_id in ADMINS:
         return True
 
-    member_status = ChatMemberStatus.OWNER, ChatMemberStatus.ADMINISTRATOR, ChatMemberStatus.MEMBER
-
-    for channel_id in [FORCE_SUB_CHANNEL, FORCE_SUB_CHANNEL2, FORCE_SUB_CHANNEL3, FORCE_SUB_CHANNEL4]:
-        if not channel_id:
+    unknown = []
+    for channel_id in FORCE_SUB_CHANNELS:
+        if membership_index.is_member(channel_id, user_id):
             continue
-
-        try:
-            member = await client.get_chat_member(chat_id=channel_id, user_id=user_id)
-        except UserNotParticipant:
-            return False
-
-        if member.status not in member_status:
+        if membership_cache.get((user_id, channel_id)) is False:
             return False
+        unknown.append(channel_id)
+    if not unknown:
+        return True
 
-    return True
+    results = await asyncio.gather(*[check_membership(client, channel_id, user_id) for channel_id in unknown])
+    for channel_id, is_member in zip(unknown, results):
+        if is_member:
+            asyncio.create_task(membership_index.update(channel_id, user_id, True))
+            continue
+        if membership_index.is_known(channel_id, user_id):
+            # An expired membership turned out to be stale
+            asyncio.create_task(membership_index.update(channel_id, user_id, False))
+        membership_cache.set((user_id, channel_id), False, ttl=MEMBERSHIP_NEGATIVE_TTL)
+    return all(results)
 
 async def encode(string):
     string_bytes = string.encode("ascii")
@@ -54,9 +128,9 @@ def generate_token(length=10):
     return ''.join(random.choices(string.ascii_letters + string.digits, k=length))
 
 async def get_shortlink(url, api, link):
-    """Generates a shortened URL using Shortzy."""
+    """Generates a shortened URL with the configured shortener providers."""
     try:
-        shortened_link = await shortzy.convert(link)
+        shortened_link = await shortener.shorten(link)
         return shortened_link
     except Exception as e:
         logger.error(f"Error generating short link: {str(e)}")
@@ -73,21 +147,6 @@ async def notify_user(client, user_id, message):
       
 
 
-# Increase or decrease user credits
-async def increase_user_limit(user_id, increment):
-    user_data = await users_collection.find_one({"user_id": user_id})
-    if not user_data:
-        logger.warning(f"User {user_id} not found in the database.")
-        return
-
-    new_limit = user_data.get("credits", 0) + increment
-    if new_limit < 0:
-        new_limit = 0
-
-    await users_collection.update_one({"user_id": user_id}, {"$set": {"credits": new_limit}})
-
-    logger.info(f"User {user_id}'s credit limit updated to {new_limit}.")
-    
 # Function to check premium status
 def check_premium_status(user_data):
     credits = user_data.get("credits", 0)
@@ -99,19 +158,6 @@ def check_premium_status(user_data):
         return "bronze"
     return "normal"
 
-
-# Function to auto-remove premium if credits are too low
-async def auto_remove_premium(user_id):
-    user_data = await users_collection.find_one({"user_id": user_id})
-    if user_data.get("is_premium", False) and user_data.get("credits", 0) < 20:
-        # Remove premium status
-        user_data["is_premium"] = False
-        user_data["premium_status"] = "normal"
-        await users_collection.update_one({"user_id": user_id}, {"$set": user_data})
-        logger.info(f"Removed premium status for user {user_id}.")
-        return True
-    return False
-
 """
 async def decode(base64_string):
     # Determine if it's a 'limit' link or a regular start link
@@ -132,28 +178,503 @@ async def decode(base64_string):
     return string
 """
 
-async def get_messages(client, message_ids):
-    messages = []
-    total_messages = 0
-    while total_messages != len(message_ids):
-        temb_ids = message_ids[total_messages:total_messages+200]
+FETCH_CHUNK_SIZE = 200  # Telegram's limit for a single get_messages call
+
+class MessageFetchError(Exception):
+    """A chunk of DB channel messages could not be fetched."""
+
+    def __init__(self, message_ids, error):
+        self.message_ids = message_ids
+        self.error = error
+        super().__init__(f"Failed to fetch messages {message_ids[0]}..{message_ids[-1]}: {error!r}")
+
+async def fetch_chunk(client, message_ids, retries=FETCH_RETRIES):
+    """Fetches up to FETCH_CHUNK_SIZE DB channel messages, dropping empty or
+    deleted ones. FloodWaits and transient errors are retried with jitter."""
+
+    for attempt in range(retries + 1):
         try:
             msgs = await client.get_messages(
                 chat_id=client.db_channel.id,
-                message_ids=temb_ids
+                message_ids=list(message_ids)
             )
+            return [msg for msg in msgs if msg and not msg.empty]
         except FloodWait as e:
-            await asyncio.sleep(e.x)
-            msgs = await client.get_messages(
-                chat_id=client.db_channel.id,
-                message_ids=temb_ids
-            )
-        except:
-            pass
-        total_messages += len(temb_ids)
+            if attempt == retries:
+                raise MessageFetchError(message_ids, e) from e
+            await asyncio.sleep(e.value + random.uniform(0, 1))
+        except Exception as e:
+            if attempt == retries:
+                raise MessageFetchError(message_ids, e) from e
+            await asyncio.sleep(random.uniform(0.5, 1.5) * 2 ** attempt)
+
+async def iter_chunks(resolve, message_ids, concurrency=FETCH_CONCURRENCY, chunk_size=FETCH_CHUNK_SIZE):
+    """Runs resolve(chunk) over message_ids chunk by chunk with up to
+    `concurrency` chunks in flight, yielding (chunk, result, error) in order.
+    error is the MessageFetchError a chunk failed with, or None."""
+
+    ids = iter(message_ids)
+    chunks = iter(lambda: list(islice(ids, chunk_size)), [])
+    in_flight = deque()
+
+    def fill():
+        while len(in_flight) < concurrency:
+            chunk = next(chunks, None)
+            if chunk is None:
+                return
+            in_flight.append((chunk, asyncio.ensure_future(resolve(chunk))))
+
+    try:
+        fill()
+        while in_flight:
+            chunk, task = in_flight.popleft()
+            try:
+                result, error = await task, None
+            except MessageFetchError as e:
+                result, error = None, e
+            fill()
+            yield chunk, result, error
+    finally:
+        for _, task in in_flight:
+            task.cancel()
+
+async def iter_messages(client, message_ids, concurrency=FETCH_CONCURRENCY, chunk_size=FETCH_CHUNK_SIZE, skipped=None):
+    """Yields DB channel messages chunk by chunk, in order, while up to
+    `concurrency` chunks are fetched in parallel. A chunk that keeps failing
+    is logged and skipped, its ids are added to the `skipped` list if given;
+    MessageFetchError is raised only if every chunk failed."""
+
+    fetched = failed = 0
+    last_error = None
+    async for chunk, msgs, error in iter_chunks(lambda chunk: fetch_chunk(client, chunk), message_ids, concurrency, chunk_size):
+        if error is not None:
+            logger.error(str(error))
+            failed += 1
+            last_error = error
+            if skipped is not None:
+                skipped.extend(error.message_ids)
+            continue
+        fetched += 1
+        yield msgs
+
+    if failed and not fetched:
+        raise last_error
+
+async def get_messages(client, message_ids, skipped=None):
+    messages = []
+    async for msgs in iter_messages(client, message_ids, skipped=skipped):
         messages.extend(msgs)
     return messages
 
+# Media kinds that can be re-sent from their file_id alone
+CACHEABLE_MEDIA = ("document", "video", "audio", "photo", "animation", "voice")
+
+def _post_size(post):
+    size = 200
+    for key in ("file_id", "text", "file_name"):
+        size += len(post.get(key) or "")
+    for row in post.get("buttons") or []:
+        for text, url in row:
+            size += 50 + len(text) + len(url)
+    return size
+
+# DB channel posts reduced to what delivery needs, keyed by message id
+post_cache = LRUCache(maxsize=None, max_bytes=MESSAGE_CACHE_BYTES, sizeof=_post_size)
+
+def to_post(msg):
+    """Reduces a DB channel message to a compact post record, or None if it
+    can't be re-sent without the original message (polls, stickers, ...)."""
+
+    buttons = []
+    if msg.reply_markup and isinstance(msg.reply_markup, InlineKeyboardMarkup):
+        for row in msg.reply_markup.inline_keyboard:
+            if any(not button.url for button in row):
+                return None
+            buttons.append([[button.text, button.url] for button in row])
+
+    for media in CACHEABLE_MEDIA:
+        attachment = getattr(msg, media, None)
+        if attachment:
+            return {
+                "id": msg.id,
+                "media": media,
+                "file_id": attachment.file_id,
+                "text": msg.caption.html if msg.caption else "",
+                "file_name": getattr(attachment, "file_name", None),
+                "buttons": buttons
+            }
+    if msg.text:
+        return {
+            "id": msg.id,
+            "media": None,
+            "file_id": None,
+            "text": msg.text.html,
+            "file_name": None,
+            "buttons": buttons
+        }
+    return None
+
+# Coalesces concurrent resolutions of the same id set (e.g. a viral link)
+post_flights = SingleFlight()
+
+async def get_posts(client, message_ids, skipped=None):
+    """Resolves DB channel posts in the given order. Cached posts are served
+    from memory, then from the stored manifest; only ids missing from both
+    are fetched from the DB channel (and backfilled into the manifest).
+    Messages that can't be cached are returned as-is. Ids whose fetch failed
+    are left out and added to the `skipped` list if given.
+
+    Concurrent calls for the same ids share a single resolution."""
+
+    message_ids = tuple(message_ids)
+    posts, failed = await post_flights.do(("posts", message_ids), _resolve_posts, client, message_ids)
+    if skipped is not None:
+        skipped.extend(failed)
+    return posts
+
+async def _resolve_posts(client, message_ids):
+    posts = {}
+    missing = []
+    failed = []
+    for msg_id in message_ids:
+        post = post_cache.get(msg_id)
+        if post is None:
+            missing.append(msg_id)
+        else:
+            posts[msg_id] = post
+
+    if missing:
+        try:
+            saved = await get_saved_posts(missing)
+        except Exception as e:
+            logger.warning(f"Could not read post manifest: {e}")
+            saved = {}
+        for msg_id, post in saved.items():
+            post_cache.set(msg_id, post)
+            posts[msg_id] = post
+        missing = [msg_id for msg_id in missing if msg_id not in saved]
+
+    if missing:
+        try:
+            msgs = await get_messages(client, missing, skipped=failed)
+        except MessageFetchError as e:
+            # Keep what the caches resolved, only the fetched ids are lost
+            logger.error(str(e))
+            msgs = []
+            failed = list(missing)
+        fetched = []
+        for msg in msgs:
+            if not msg or msg.empty:
+                continue
+            post = to_post(msg)
+            if post is None:
+                posts[msg.id] = msg
+            else:
+                post_cache.set(msg.id, post)
+                posts[msg.id] = post
+                fetched.append(post)
+        try:
+            await save_posts(fetched)
+        except Exception as e:
+            logger.warning(f"Could not backfill post manifest: {e}")
+
+    return [posts[msg_id] for msg_id in message_ids if msg_id in posts], failed
+
+async def iter_posts(client, message_ids, concurrency=FETCH_CONCURRENCY, chunk_size=FETCH_CHUNK_SIZE, skipped=None):
+    """Resolves posts chunk by chunk (see get_posts) without materialising the
+    whole id set, with up to `concurrency` chunks resolved in parallel and
+    yielded in order. Ids that can't be fetched are added to the `skipped`
+    list if given."""
+
+    async for _, posts, _ in iter_chunks(lambda chunk: get_posts(client, chunk, skipped), message_ids, concurrency, chunk_size):
+        yield posts
+
+async def prefetch(source, depth=PIPELINE_DEPTH):
+    """Runs an async iterator up to `depth` items ahead of its consumer
+    through a bounded queue, so producing and consuming overlap."""
+
+    queue = asyncio.Queue(maxsize=depth)
+    done = object()
+
+    async def produce():
+        try:
+            async for item in source:
+                await queue.put((item, None))
+            await queue.put((done, None))
+        except Exception as e:
+            await queue.put((done, e))
+
+    producer = asyncio.create_task(produce())
+    try:
+        while True:
+            item, error = await queue.get()
+            if error is not None:
+                raise error
+            if item is done:
+                return
+            yield item
+    finally:
+        producer.cancel()
+
+MANIFEST_MAX_BYTES = 8 * 1024 * 1024  # Bigger manifests keep using id links to stay well under Mongo's 16MB document limit
+
+# Hot manifests: manifest id -> {"ids": [...], "posts": {message_id: post}}
+manifest_cache = LRUCache(
+    maxsize=MANIFEST_CACHE_SIZE,
+    max_bytes=MANIFEST_CACHE_BYTES,
+    sizeof=lambda manifest: manifest_size(manifest["ids"], manifest["posts"].values())
+)
+
+def post_id(post):
+    return post.id if isinstance(post, Message) else post["id"]
+
+async def get_manifest_entry(manifest_id):
+    manifest = manifest_cache.get(manifest_id)
+    if manifest is None:
+        manifest = await post_flights.do(("manifest", manifest_id), _load_manifest, manifest_id)
+    return manifest
+
+async def _load_manifest(manifest_id):
+    doc = await get_manifest(manifest_id)
+    if doc is None:
+        return None
+    manifest = {"ids": doc["ids"], "posts": {post["id"]: post for post in doc["posts"]}}
+    manifest_cache.set(manifest_id, manifest)
+    return manifest
+
+async def iter_manifest_posts(client, manifest, chunk_size=FETCH_CHUNK_SIZE, skipped=None):
+    """Yields a manifest's posts chunk by chunk. Ids stored without a post
+    record (uncacheable messages) are resolved through get_posts, ids that
+    can't be fetched are added to the `skipped` list if given."""
+
+    ids = manifest["ids"]
+    for i in range(0, len(ids), chunk_size):
+        chunk = ids[i:i + chunk_size]
+        resolved = {}
+        missing = [msg_id for msg_id in chunk if msg_id not in manifest["posts"]]
+        if missing:
+            resolved = {post_id(post): post for post in await get_posts(client, missing, skipped)}
+        posts = [manifest["posts"].get(msg_id) or resolved.get(msg_id) for msg_id in chunk]
+        yield [post for post in posts if post is not None]
+
+def open_link(client, payload, skipped=None):
+    """Decodes a start payload (manifest, versioned or legacy link) and returns
+    an async iterator over its posts, chunk by chunk. Ids that couldn't be
+    fetched are added to the `skipped` list if given. Raises LinkError for
+    malformed or forged payloads."""
+
+    manifest_id = decode_manifest_link(payload, client.db_channel.id)
+    if manifest_id is not None:
+        return _iter_manifest_link(client, manifest_id, skipped)
+    return iter_posts(client, chain.from_iterable(decode_link(payload, client.db_channel.id)), skipped=skipped)
+
+async def _iter_manifest_link(client, manifest_id, skipped=None):
+    # One indexed lookup (or a cache hit) gives every file of the link
+    manifest = await get_manifest_entry(manifest_id)
+    if manifest is None:
+        raise LookupError(f"Manifest {manifest_id} not found")
+    async for posts in iter_manifest_posts(client, manifest, skipped=skipped):
+        yield posts
+
+async def reserve_manifest_link(client):
+    """Reserves a manifest id and returns (manifest_id, start payload), or
+    (None, None) if the manifest store is unavailable."""
+
+    try:
+        manifest_id = await new_manifest_id()
+    except Exception as e:
+        logger.warning(f"Could not reserve a manifest id: {e}")
+        return None, None
+    return manifest_id, encode_manifest_link(manifest_id, client.db_channel.id)
+
+def manifest_size(message_ids, records):
+    # Rough BSON size: post records as sized for the cache plus the id list
+    return sum(_post_size(record) for record in records) + 16 * len(message_ids)
+
+async def store_manifest(manifest_id, message_ids, posts):
+    """Saves a manifest. Returns False if it is too big or couldn't be saved,
+    in which case its payload must not be handed out."""
+
+    records = [post for post in posts if post is not None and not isinstance(post, Message)]
+    size = manifest_size(message_ids, records)
+    if size > MANIFEST_MAX_BYTES:
+        logger.warning(f"Manifest {manifest_id} would take about {size} bytes, using an id link instead.")
+        return False
+    try:
+        await save_manifest(manifest_id, message_ids, records)
+    except Exception as e:
+        logger.error(f"Could not save manifest {manifest_id}: {e}")
+        return False
+    return True
+
+async def make_link(client, message_ids):
+    """Returns a start payload for message_ids. The ids are resolved once and
+    stored as a manifest (deleted posts are left out); batches too big for a
+    manifest, posts that couldn't be fetched or a failing manifest store fall
+    back to an id link."""
+
+    message_ids = list(message_ids)
+    # Every post record takes at least _post_size({}) bytes, so skip resolving batches that can't fit
+    if len(message_ids) * (_post_size({}) + 16) <= MANIFEST_MAX_BYTES:
+        manifest_id, payload = await reserve_manifest_link(client)
+        if manifest_id is not None:
+            skipped = []
+            try:
+                posts = await get_posts(client, message_ids, skipped)
+            except MessageFetchError as e:
+                logger.error(str(e))
+                posts, skipped = None, message_ids
+            # A manifest missing the unfetched ids would silently drop their files
+            if skipped:
+                logger.warning(f"Could not resolve {len(skipped)} of {len(message_ids)} posts, using an id link instead.")
+            elif posts and await store_manifest(manifest_id, [post_id(post) for post in posts], posts):
+                return payload
+    return encode_link(message_ids, client.db_channel.id)
+
+def post_caption(post):
+    if bool(CUSTOM_CAPTION) and post["media"] == "document":
+        return CUSTOM_CAPTION.format(previouscaption=post["text"], filename=post["file_name"])
+    return post["text"]
+
+def post_reply_markup(post):
+    if DISABLE_CHANNEL_BUTTON or not post["buttons"]:
+        return None
+    return InlineKeyboardMarkup(
+        [[InlineKeyboardButton(text, url=url) for text, url in row] for row in post["buttons"]]
+    )
+
+async def record_post(msg, share_url=None):
+    """Stores the file_id, media type and caption of a freshly ingested DB
+    channel message so it can be delivered without reading the channel."""
+
+    post = to_post(msg)
+    if post is None:
+        return None
+    if share_url and not DISABLE_CHANNEL_BUTTON:
+        post["buttons"] = [[["🔁 Share URL", share_url]]]
+    post_cache.set(post["id"], post)
+    try:
+        await save_post(post)
+    except Exception as e:
+        logger.warning(f"Could not record post {post['id']}: {e}")
+    return post
+
+def _evict_manifests(message_ids):
+    # Cached manifests holding any of the posts are reloaded on their next open
+    message_ids = set(message_ids)
+    for manifest_id in manifest_cache.keys():
+        manifest = manifest_cache.get(manifest_id, count=False)
+        if manifest is not None and not message_ids.isdisjoint(manifest["ids"]):
+            manifest_cache.pop(manifest_id)
+
+async def refresh_post(msg):
+    """Brings the cached and stored copies of an edited DB channel post up to
+    date, so users get the new caption, file or buttons."""
+
+    post = to_post(msg)
+    if post is None:
+        # No longer re-sendable from a record, deliver it from the channel
+        await forget_posts([msg.id], deleted=False)
+        return
+    if post == post_cache.get(post["id"], count=False):
+        return  # e.g. the share button this bot just added
+    post_cache.set(post["id"], post)
+    _evict_manifests([post["id"]])
+    try:
+        await save_post(post)
+        await update_manifest_post(post)
+    except Exception as e:
+        logger.warning(f"Could not update edited post {post['id']}: {e}")
+
+async def forget_posts(message_ids, deleted=True):
+    """Drops DB channel posts from the post cache, the posts collection and the
+    manifests. Deleted posts are left out of manifest links from then on."""
+
+    for message_id in message_ids:
+        post_cache.pop(message_id)
+    _evict_manifests(message_ids)
+    try:
+        await delete_posts(message_ids)
+        await remove_manifest_posts(message_ids, deleted)
+    except Exception as e:
+        logger.warning(f"Could not forget posts {list(message_ids)}: {e}")
+
+async def send_post(client, chat_id, post):
+    """Delivers a post (or an uncached Message) to chat_id and returns the sent message."""
+
+    if isinstance(post, Message):
+        caption = (
+            CUSTOM_CAPTION.format(
+                previouscaption="" if not post.caption else post.caption.html,
+                filename=post.document.file_name
+            )
+            if bool(CUSTOM_CAPTION) and bool(post.document)
+            else "" if not post.caption else post.caption.html
+        )
+        return await post.copy(
+            chat_id=chat_id,
+            caption=caption,
+            parse_mode=ParseMode.HTML,
+            reply_markup=post.reply_markup if not DISABLE_CHANNEL_BUTTON else None,
+            protect_content=PROTECT_CONTENT
+        )
+
+    if post["media"] is None:
+        return await client.send_message(
+            chat_id=chat_id,
+            text=post["text"],
+            parse_mode=ParseMode.HTML,
+            reply_markup=post_reply_markup(post),
+            protect_content=PROTECT_CONTENT
+        )
+    return await client.send_cached_media(
+        chat_id=chat_id,
+        file_id=post["file_id"],
+        caption=post_caption(post),
+        parse_mode=ParseMode.HTML,
+        reply_markup=post_reply_markup(post),
+        protect_content=PROTECT_CONTENT
+    )
+
+# Media that Telegram lets share one album, and how each is wrapped
+ALBUM_KINDS = {"photo": "visual", "video": "visual", "document": "document", "audio": "audio"}
+ALBUM_MEDIA = {"photo": InputMediaPhoto, "video": InputMediaVideo, "document": InputMediaDocument, "audio": InputMediaAudio}
+ALBUM_SIZE = 10
+
+def pack_albums(posts):
+    """Splits posts into delivery groups, keeping their order. Consecutive
+    photos/videos, documents or audios are packed into groups of up to
+    ALBUM_SIZE; everything else is sent on its own."""
+
+    groups = []
+    current, current_kind = [], None
+    for post in posts:
+        kind = None if isinstance(post, Message) else ALBUM_KINDS.get(post["media"])
+        if kind is None or kind != current_kind or len(current) == ALBUM_SIZE:
+            if current:
+                groups.append(current)
+            current, current_kind = [], kind
+        current.append(post)
+        if kind is None:
+            groups.append(current)
+            current, current_kind = [], None
+    if current:
+        groups.append(current)
+    return groups
+
+async def send_album(client, chat_id, posts):
+    """Delivers a packed group with send_media_group and returns the sent
+    messages. Albums can't carry buttons, so reply markups are dropped."""
+
+    media = [
+        ALBUM_MEDIA[post["media"]](post["file_id"], caption=post_caption(post), parse_mode=ParseMode.HTML)
+        for post in posts
+    ]
+    return await client.send_media_group(chat_id=chat_id, media=media, protect_content=PROTECT_CONTENT)
+
+def delivery_stats():
+    return {"posts": post_cache.stats(), "manifests": manifest_cache.stats(), "flights": post_flights.stats()}
+
 async def get_message_id(client, message):
     if message.forward_from_chat:
         if message.forward_from_chat.id == client.db_channel.id:
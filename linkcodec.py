@@ -0,0 +1,207 @@
+# Deep-link payload codec.
+#
+# Legacy links are base64 of "get-<id*abs(channel_id)>[-<id*abs(channel_id)>]"
+# and can only express one contiguous range. Version 1 links are binary:
+#
+#   byte 0    version (1). Legacy payloads start with "g" (0x67), so the first
+#             byte tells both formats apart.
+#   byte 1    flags. FLAG_SIGNED: a TAG_SIZE-byte HMAC tag ends the payload.
+#             Required whenever LINK_SECRET is set.
+#   runs      one or more (delta, span) pairs of zigzag varints. delta is the
+#             run's first id minus the previous run's last id (0 before the
+#             first run); span is +/-(length - 1) for ascending/descending runs.
+#   tag       HMAC-SHA256 over the channel id and everything before the tag,
+#             truncated to TAG_SIZE bytes.
+#
+# Version 2 links point at a stored manifest instead of carrying ids:
+#
+#   byte 0    version (2)
+#   byte 1    flags, as above
+#   id        manifest id as a varint
+#   tag       as above
+#
+# The whole thing is base64url without padding and must fit Telegram's
+# 64-character start parameter.
+
+import base64
+import hashlib
+import hmac
+from config import LINK_SECRET
+
+VERSION = 1
+MANIFEST_VERSION = 2
+FLAG_SIGNED = 1
+TAG_SIZE = 6
+MAX_PAYLOAD_CHARS = 64
+LEGACY_PREFIX = ord("g")
+
+
+class LinkError(ValueError):
+    pass
+
+
+def _zigzag(value):
+    return value * 2 if value >= 0 else -value * 2 - 1
+
+def _unzigzag(value):
+    return value >> 1 if not value & 1 else -((value + 1) >> 1)
+
+def _write_varint(out, value):
+    while value > 0x7F:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+def _read_varint(data, pos, end):
+    value = shift = 0
+    while pos < end:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return value, pos
+        shift += 7
+        if shift > 63:
+            break
+    raise LinkError("truncated or oversized varint")
+
+def _tag(secret, channel_id, data):
+    key = secret.encode() if isinstance(secret, str) else secret
+    message = str(abs(channel_id)).encode() + b":" + bytes(data)
+    return hmac.new(key, message, hashlib.sha256).digest()[:TAG_SIZE]
+
+def _b64encode(data):
+    return base64.urlsafe_b64encode(bytes(data)).decode("ascii").rstrip("=")
+
+def _b64decode(payload):
+    payload = payload.strip().rstrip("=")
+    try:
+        return base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4))
+    except (ValueError, TypeError) as e:
+        raise LinkError(f"invalid base64 payload: {e}")
+
+
+def to_runs(message_ids):
+    """Collapses ids into [(first, last)] runs of consecutive ids, keeping order."""
+
+    if isinstance(message_ids, range) and abs(message_ids.step) == 1:
+        return [(message_ids[0], message_ids[-1])] if message_ids else []
+
+    runs = []
+    for msg_id in message_ids:
+        if runs:
+            first, last = runs[-1]
+            step = last - first
+            if msg_id == last + 1 and step >= 0 or msg_id == last - 1 and step <= 0:
+                runs[-1] = (first, msg_id)
+                continue
+        runs.append((msg_id, msg_id))
+    return runs
+
+def encode_link(message_ids, channel_id, secret=LINK_SECRET):
+    """Encodes message ids (any order, gaps allowed) as a version 1 payload.
+    Raises LinkError if the result doesn't fit Telegram's start parameter."""
+
+    runs = to_runs(message_ids)
+    if not runs:
+        raise LinkError("no message ids to encode")
+
+    out = bytearray((VERSION, FLAG_SIGNED if secret else 0))
+    previous = 0
+    for first, last in runs:
+        _write_varint(out, _zigzag(first - previous))
+        _write_varint(out, _zigzag(last - first))
+        previous = last
+    if secret:
+        out += _tag(secret, channel_id, out)
+
+    payload = _b64encode(out)
+    if len(payload) > MAX_PAYLOAD_CHARS:
+        raise LinkError(f"{len(runs)} runs don't fit in one link ({len(payload)} chars)")
+    return payload
+
+def encode_manifest_link(manifest_id, channel_id, secret=LINK_SECRET):
+    """Encodes a reference to a stored manifest as a version 2 payload."""
+
+    out = bytearray((MANIFEST_VERSION, FLAG_SIGNED if secret else 0))
+    _write_varint(out, manifest_id)
+    if secret:
+        out += _tag(secret, channel_id, out)
+    return _b64encode(out)
+
+def _body_end(data, channel_id, secret):
+    # Checks the tag (required whenever a secret is set) and returns where the body ends
+    if len(data) < 2:
+        raise LinkError("payload too short")
+    end = len(data)
+    if secret and not data[1] & FLAG_SIGNED:
+        raise LinkError("unsigned link")
+    if data[1] & FLAG_SIGNED:
+        end -= TAG_SIZE
+        if end < 2:
+            raise LinkError("payload too short")
+        if not secret or not hmac.compare_digest(_tag(secret, channel_id, data[:end]), data[end:]):
+            raise LinkError("bad link signature")
+    return end
+
+def _decode_v1(data, channel_id, secret):
+    end = _body_end(data, channel_id, secret)
+
+    ranges = []
+    previous = 0
+    pos = 2
+    while pos < end:
+        delta, pos = _read_varint(data, pos, end)
+        span, pos = _read_varint(data, pos, end)
+        first = previous + _unzigzag(delta)
+        last = first + _unzigzag(span)
+        if first <= 0 or last <= 0:
+            raise LinkError("message ids must be positive")
+        ranges.append(range(first, last + 1) if last >= first else range(first, last - 1, -1))
+        previous = last
+    if not ranges:
+        raise LinkError("payload has no ids")
+    return ranges
+
+def _decode_legacy(data, channel_id):
+    try:
+        argument = data.decode("ascii").split("-")
+        multiplier = abs(channel_id)
+        if len(argument) == 3:
+            start = int(int(argument[1]) / multiplier)
+            end = int(int(argument[2]) / multiplier)
+        elif len(argument) == 2:
+            start = end = int(int(argument[1]) / multiplier)
+        else:
+            raise LinkError(f"unexpected legacy payload {argument!r}")
+    except (UnicodeDecodeError, ValueError) as e:
+        raise LinkError(f"invalid legacy payload: {e}")
+    return [range(start, end + 1) if start <= end else range(start, end - 1, -1)]
+
+def decode_link(payload, channel_id, secret=LINK_SECRET):
+    """Decodes a start parameter (legacy or version 1) into a list of ranges of
+    DB channel message ids, without expanding them."""
+
+    data = _b64decode(payload)
+    if not data:
+        raise LinkError("empty payload")
+    if data[0] == LEGACY_PREFIX:
+        return _decode_legacy(data, channel_id)
+    if data[0] == VERSION:
+        return _decode_v1(memoryview(data), channel_id, secret)
+    if data[0] == MANIFEST_VERSION:
+        raise LinkError("manifest link, use decode_manifest_link")
+    raise LinkError(f"unknown link version {data[0]}")
+
+def decode_manifest_link(payload, channel_id, secret=LINK_SECRET):
+    """Returns the manifest id of a version 2 payload, or None for other versions."""
+
+    data = _b64decode(payload)
+    if not data or data[0] != MANIFEST_VERSION:
+        return None
+    data = memoryview(data)
+    end = _body_end(data, channel_id, secret)
+    manifest_id, pos = _read_varint(data, 2, end)
+    if pos != end:
+        raise LinkError("trailing bytes after manifest id")
+    return manifest_id
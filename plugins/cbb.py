@@ -52,9 +52,8 @@ async def cb_handler(client: Bot, query: CallbackQuery):
 
         if is_admin:
 
-            users = await full_userbase()
             user_token_details = ""
-            for user in users[:100]:  # Limit to first 100 users for brevity
+            async for user in iter_user_ids(limit=100):  # Limit to first 100 users for brevity
                 tokens = await get_user_token_count(user)
                 user_token_details += f"User ID: {user} - Tokens: {tokens}\n"
             response = (
@@ -5,38 +5,54 @@
 import asyncio
 from pyrogram import filters, Client
 from pyrogram.types import Message, InlineKeyboardMarkup, InlineKeyboardButton
-from pyrogram.errors import FloodWait
 from bot import Bot
 from config import ADMINS, CHANNEL_ID, DISABLE_CHANNEL_BUTTON
-from helper_func import encode
+from helper_func import record_post, reserve_manifest_link, store_manifest, refresh_post, forget_posts
+from linkcodec import encode_link
+from ratelimit import send_scheduler
 
 
 
 
-@Bot.on_message(filters.private & filters.user(ADMINS) & ~filters.command(['start','users','creditreport','broadcast','help','token_stats','batch','genlink','stats','addcredits','givepr','givecredits','profile','check','count','plans','upi']))
+async def attach_link(client, post_message, base64_string):
+    """Puts the share button for base64_string on a DB channel post and records
+    the post. Returns (link, reply_markup, post record)."""
+
+    link = f"https://t.me/{client.username}?start={base64_string}"
+    share_url = f'https://telegram.me/share/url?url={link}'
+    reply_markup = InlineKeyboardMarkup([[InlineKeyboardButton("🔁 Share URL", url=share_url)]])
+
+    if not DISABLE_CHANNEL_BUTTON:
+        await post_message.edit_reply_markup(reply_markup)
+
+    post = await record_post(post_message, share_url)
+    return link, reply_markup, post
+
+
+@Bot.on_message(filters.private & filters.user(ADMINS) & ~filters.command(['start','users','creditreport','broadcast','help','token_stats','batch','genlink','stats','addcredits','givepr','givecredits','profile','check','count','plans','upi','toplinks','pausebroadcast','resumebroadcast','cancelbroadcast','indexreport']))
 async def channel_post(client: Client, message: Message):
     reply_text = await message.reply_text("Please Wait...!", quote = True)
     try:
-        post_message = await message.copy(chat_id = client.db_channel.id, disable_notification=True)
-    except FloodWait as e:
-        await asyncio.sleep(e.x)
-        post_message = await message.copy(chat_id = client.db_channel.id, disable_notification=True)
+        post_message = await send_scheduler.send(
+            client.db_channel.id, message.copy, chat_id = client.db_channel.id, disable_notification=True
+        )
     except Exception as e:
         print(e)
         await reply_text.edit_text("Something went Wrong..!")
         return
-    converted_id = post_message.id * abs(client.db_channel.id)
-    string = f"get-{converted_id}"
-    base64_string = await encode(string)
-    link = f"https://t.me/{client.username}?start={base64_string}"
+    manifest_id, base64_string = await reserve_manifest_link(client)
+    if manifest_id is None:
+        base64_string = encode_link([post_message.id], client.db_channel.id)
+    link, reply_markup, post = await attach_link(client, post_message, base64_string)
 
-    reply_markup = InlineKeyboardMarkup([[InlineKeyboardButton("🔁 Share URL", url=f'https://telegram.me/share/url?url={link}')]])
+    # The manifest holds the post with its share button, so it can only be
+    # saved now, and the link is handed out once it is
+    if manifest_id is not None and not await store_manifest(manifest_id, [post_message.id], [post]):
+        base64_string = encode_link([post_message.id], client.db_channel.id)
+        link, reply_markup, post = await attach_link(client, post_message, base64_string)
 
     await reply_text.edit(f"<b>Here is your link</b>\n\n{link}", reply_markup=reply_markup, disable_web_page_preview = True)
 
-    if not DISABLE_CHANNEL_BUTTON:
-        await post_message.edit_reply_markup(reply_markup)
-
 
 
 
@@ -45,18 +61,29 @@ async def channel_post(client: Client, message: Message):
 async def new_post(client: Client, message: Message):
 
     if DISABLE_CHANNEL_BUTTON:
+        await record_post(message)
         return
 
-    converted_id = message.id * abs(client.db_channel.id)
-    string = f"get-{converted_id}"
-    base64_string = await encode(string)
+    base64_string = encode_link([message.id], client.db_channel.id)
     link = f"https://t.me/{client.username}?start={base64_string}"
-    reply_markup = InlineKeyboardMarkup([[InlineKeyboardButton("🔁 Share URL", url=f'https://telegram.me/share/url?url={link}')]])
+    share_url = f'https://telegram.me/share/url?url={link}'
+    reply_markup = InlineKeyboardMarkup([[InlineKeyboardButton("🔁 Share URL", url=share_url)]])
     try:
         await message.edit_reply_markup(reply_markup)
     except Exception as e:
         print(e)
-        pass
+        share_url = None
+    await record_post(message, share_url)
+
+
+@Bot.on_edited_message(filters.channel & filters.chat(CHANNEL_ID))
+async def edited_post(client: Client, message: Message):
+    await refresh_post(message)
+
+
+@Bot.on_deleted_messages(filters.chat(CHANNEL_ID))
+async def deleted_posts(client: Client, messages):
+    await forget_posts([message.id for message in messages])
 
 
 
@@ -3,51 +3,40 @@ from pyrogram import filters, Client
 from config import *
 from database.database import *
 from helper_func import *
+from database.database import increase_user_limit
 from datetime import datetime
 from pyrogram.types import Message, CallbackQuery, InlineKeyboardMarkup, InlineKeyboardButton 
 from pyrogram.enums import ParseMode
 import asyncio
 import logging
-import os
-from io import StringIO
+import zlib
+import aiofiles
+import aiofiles.os
+import aiofiles.tempfile
+from auto_delete import auto_delete
+from popularity import link_popularity
+from database.links import get_top_links
+from database.indexes import query_plan_report
 
 
 # Set up logging
 logger = logging.getLogger(__name__)
 
-# Function to delete a message after a specified delay
-async def delete_message_after_delay(message: Message, delay: int):
-    await asyncio.sleep(delay)
-    try:
-        await message.delete()
-    except Exception as e:
-        logger.error(f"Failed to delete message: {e}")
-
 @Client.on_message(filters.command('creditreport') & filters.private & filters.user(ADMINS))
 async def generate_credit_report(client: Client, message: Message):
 
+    file_path = None
     try:
 
-        users = await phdlust.find({}, {"_id": 1, "limit": 1}).to_list(length=None)
-        
-
-        sorted_users = sorted(users, key=lambda x: x.get("limit", 0), reverse=True)
-        top_10_users = sorted_users[:10]
-
-
-        output = StringIO()
-        output.write("User ID, Remaining Credits\n")
-        for user in sorted_users:
-            output.write(f"{user['_id']}, {user.get('limit', 0)}\n")
-
+        top_10_users = await get_top_users(10)
 
-        file_path = "/tmp/user_credits_report.txt"
-        with open(file_path, "w") as file:
-            file.write(output.getvalue())
+        # Every report gets its own file, so concurrent admins don't collide
+        file_path = await write_credit_report()
 
         await client.send_document(
             chat_id=message.chat.id,
             document=file_path,
+            file_name="user_credits_report.csv.gz",
             caption="📊 Here is the detailed credit report of all users, sorted by remaining credits."
         )
 
@@ -61,12 +50,38 @@ async def generate_credit_report(client: Client, message: Message):
 
         await message.reply_text(top_10_summary)
 
-
-        os.remove(file_path)
-
     except Exception as e:
         logger.error(f"Error in generating credit report: {e}")
         await message.reply_text("❌ An error occurred while generating the credit report.")
+    finally:
+        if file_path:
+            await aiofiles.os.remove(file_path)
+
+
+async def write_credit_report(lines_per_chunk=1000):
+    """Streams every user's credits from a sorted cursor into a new gzip CSV
+    file and returns its path. Memory use doesn't grow with the user count."""
+
+    compressor = zlib.compressobj(wbits=31)  # wbits=31 writes a gzip container
+    file_path = None
+    try:
+        async with aiofiles.tempfile.NamedTemporaryFile("wb", suffix=".csv.gz", delete=False) as file:
+            file_path = file.name
+            await file.write(compressor.compress(b"User ID,Remaining Credits\n"))
+            lines = []
+            async for user_id, credits in iter_user_credits():
+                lines.append(f"{user_id},{credits}\n")
+                if len(lines) >= lines_per_chunk:
+                    await file.write(compressor.compress("".join(lines).encode()))
+                    lines.clear()
+            await file.write(compressor.compress("".join(lines).encode()))
+            await file.write(compressor.flush())
+        return file_path
+    except BaseException:
+        # The caller never gets the path of a half-written report, so clean it up here
+        if file_path:
+            await aiofiles.os.remove(file_path)
+        raise
 
 
 
@@ -91,16 +106,13 @@ async def give_credits(client: Client, message: Message):
         credits_to_add = int(command_parts[2])
 
 
-        user_data = await phdlust.find_one({"_id": user_id})
+        user_data = await find_user(user_id)
         if not user_data:
             await message.reply_text(f"❌ User with ID {user_id} not found.")
             return
 
         # Update the user's credit limit
-        await phdlust.update_one(
-            {"_id": user_id},
-            {"$inc": {"limit": credits_to_add}}
-        )
+        await increase_user_limit(user_id, credits_to_add)
 
         await message.reply_text(f"✅ Successfully added {credits_to_add} credits to user {user_id}.")
 
@@ -193,7 +205,7 @@ async def check_premium_status(client: Client, message: Message):
     user_id = message.from_user.id
 
 
-    user = await phdlust.find_one({"_id": user_id})
+    user = await find_user(user_id)
 
     if user is None:
         await message.reply_text("You are not registered in our database. Please use /start to register.")
@@ -218,7 +230,7 @@ async def check_premium_status(client: Client, message: Message):
         )
 
 
-    asyncio.create_task(delete_message_after_delay(message, AUTO_DELETE_DELAY))
+    auto_delete.schedule(message.chat.id, message.id, AUTO_DELETE_DELAY)
 
 
 @Client.on_message(filters.command('check') & filters.private)
@@ -229,11 +241,11 @@ async def check_command(client: Client, message: Message):
         user = await get_user(user_id)
         user_limit = user.get("limit", START_COMMAND_LIMIT)
         await message.reply_text(f"💳 <b>Your current limit is {user_limit} credits.</b>", parse_mode=ParseMode.HTML)
-        asyncio.create_task(delete_message_after_delay(message, AUTO_DELETE_DELAY))
+        auto_delete.schedule(message.chat.id, message.id, AUTO_DELETE_DELAY)
     except Exception as e:
         logger.error(f"Error in check_command: {e}")
         error_message = await message.reply_text("An error occurred while checking your limit.")
-        asyncio.create_task(delete_message_after_delay(error_message, AUTO_DELETE_DELAY))
+        auto_delete.schedule(error_message.chat.id, error_message.id, AUTO_DELETE_DELAY)
 
 
 @Client.on_message(filters.command('count') & filters.private)
@@ -248,25 +260,12 @@ async def token_stats(client: Client, message: Message):
 
     try:
 
-        total_token_count = await phdlust.count_documents({"token_use_count": {"$gt": 0}})
+        # Pre-aggregated counters, no scan of the user collection
+        total_verifications_count, total_token_count = await get_verification_totals()
 
+        last_24_hours_data = await get_verification_count("24h")
 
-        total_verifications = await phdlust.aggregate([
-            {"$group": {"_id": None, "total_verifications": {"$sum": "$token_use_count"}}}
-        ]).to_list(None)
-        total_verifications_count = total_verifications[0]['total_verifications'] if total_verifications else 0
-
-
-        last_24_hours = datetime.now() - timedelta(hours=24)
-        last_24_hours_data = await phdlust.count_documents({
-            "last_token_use_time": {"$gte": last_24_hours}
-        })
-
-
-        start_of_day = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
-        day_data = await phdlust.count_documents({
-            "last_token_use_time": {"$gte": start_of_day}
-        })
+        day_data = await get_verification_count("today")
 
 
         summary_message = (
@@ -285,6 +284,43 @@ async def token_stats(client: Client, message: Message):
         await message.reply_text("An error occurred while fetching token statistics. Please try again later.")
 
 
+@Client.on_message(filters.command('toplinks') & filters.private & filters.user(ADMINS))
+async def top_links(client: Client, message: Message):
+    try:
+        await link_popularity.flush()
+        trending = link_popularity.top(10)
+        all_time = await get_top_links(10)
+
+        lines = ["🔥 **Trending links** (recent opens)\n"]
+        lines += [f"{i}. {count} - https://t.me/{client.username}?start={payload}" for i, (payload, count) in enumerate(trending, 1)] or ["No links opened yet."]
+        lines.append("\n📈 **All time**\n")
+        lines += [f"{i}. {count} - https://t.me/{client.username}?start={payload}" for i, (payload, count) in enumerate(all_time, 1)] or ["No links opened yet."]
+
+        await message.reply_text("\n".join(lines), disable_web_page_preview=True)
+    except Exception as e:
+        logger.error(f"Error fetching top links: {e}")
+        await message.reply_text("An error occurred while fetching top links.")
+
+
+@Client.on_message(filters.command('indexreport') & filters.private & filters.user(ADMINS))
+async def index_report(client: Client, message: Message):
+    try:
+        report = await query_plan_report()
+        scans = [(name, collection) for name, collection, stages in report if "COLLSCAN" in stages]
+
+        lines = [f"🔎 **Query plans** ({len(report)} hot queries)\n"]
+        for name, collection, stages in report:
+            mark = "❌" if "COLLSCAN" in stages else "✅"
+            lines.append(f"{mark} {name} ({collection}): {' > '.join(stages)}")
+        if scans:
+            lines.append(f"\n{len(scans)} queries scan their whole collection. Restart the bot to create missing indexes.")
+
+        await message.reply_text("\n".join(lines))
+    except Exception as e:
+        logger.error(f"Error building index report: {e}")
+        await message.reply_text("An error occurred while checking query plans.")
+
+
 @Client.on_message(filters.command('plans') & filters.private)
 async def show_plans(client: Client, message: Message):
     plans_text = PAYMENT_TEXT 
@@ -327,10 +363,13 @@ async def help_command(client: Client, message: Message):
 /stats - Check your bot uptime.
 /users - View bot statistics (Admins only).
 /broadcast - Broadcast any messages to bot users (Admins only).
+/pausebroadcast, /resumebroadcast, /cancelbroadcast - Control a running broadcast (Admins only).
 /addcredits credits - Add credits to your account (Admins only).
 /givecredits user_id credits - Give credits to a user (Admins only).
 /givepr user_id credits premium_status - Give premium status to a user (Admins only).
 /count - Show token usage statistics (Admins only).
+/toplinks - Show the most opened links (Admins only).
+/indexreport - Check hot queries for collection scans (Admins only).
 /creditreport - give txt file and top 10 user (Admins only).
 /plans - Show available premium plans.
 /upi - Show UPI payment options.
@@ -0,0 +1,16 @@
+# Keeps the force-sub membership index current from chat_member updates.
+# The bot must be an admin of the force-sub channels to receive them.
+
+from pyrogram import filters
+from pyrogram.types import ChatMemberUpdated
+from bot import Bot
+from helper_func import FORCE_SUB_CHANNELS, member_status, membership_index
+
+
+@Bot.on_chat_member_updated(filters.chat(FORCE_SUB_CHANNELS))
+async def track_membership(client: Bot, update: ChatMemberUpdated):
+    member = update.new_chat_member or update.old_chat_member
+    if not member or not member.user:
+        return
+    is_member = bool(update.new_chat_member) and update.new_chat_member.status in member_status
+    await membership_index.update(update.chat.id, member.user.id, is_member)
@@ -13,8 +13,12 @@ from config import *
 #from helper_func import decode, get_messages, get_shortlink , generate_token , notify_user , delete_message_after_delay , increase_user_limit , check_premium_status , auto_remove_premium 
 from helper_func import *
 from database.database import *
-import uuid
-from shortzy import Shortzy
+from auto_delete import auto_delete
+from ratelimit import send_scheduler
+from linkcodec import LinkError
+from popularity import link_popularity
+from broadcast import broadcaster, BroadcastError
+from verifytoken import make_verify_token, read_verify_token, is_legacy_token, VerifyTokenError
 import pytz
 
 # Initialize the bot
@@ -29,94 +33,58 @@ Bot = Client(
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Initialize Shortzy for URL shortening
-shortzy = Shortzy(api_key=SHORTLINK_API, base_site=SHORTLINK_URL)
+# Short verification URLs by token, so repeat visits skip the shortener
+shortlink_cache = LRUCache(maxsize=10000, ttl=SHORTLINK_TTL)
 
-async def get_shortlink(url, api, link):
-    try:
-        verification_link = await shortzy.convert(link)
-        return verification_link
-    except Exception as e:
-        logger.error(f"Error generating short link: {str(e)}")
-        return link
+async def get_verification_shortlink(client, token):
+    shortened_link = shortlink_cache.get(token)
+    if shortened_link:
+        return shortened_link
 
-async def delete_message_after_delay(message: Message, delay: int):
-    await asyncio.sleep(delay)
     try:
-        await message.delete()
+        shortened_link = await get_saved_shortlink(token)
     except Exception as e:
-        logger.error(f"Failed to delete message: {e}")
+        logger.warning(f"Could not read saved short link: {e}")
+        shortened_link = None
+
+    if not shortened_link:
+        verification_link = f"https://t.me/{client.username}?start=verify_{token}"
+        shortened_link = await get_shortlink(SHORTLINK_URL, SHORTLINK_API, verification_link)
+        if shortened_link == verification_link:
+            # Shortener failed; don't remember the fallback
+            return shortened_link
+        try:
+            await save_shortlink(token, shortened_link)
+        except Exception as e:
+            logger.warning(f"Could not save short link: {e}")
 
+    shortlink_cache.set(token, shortened_link)
+    return shortened_link
 
 @Client.on_message(filters.command('start') & filters.private  & subscribed)
 async def start_command(client: Client, message: Message):
     user_id = message.from_user.id
     text = message.text
 
-    #user_id = message.from_user.id
-
-    if not await present_user(user_id):
-        try:
-            await add_user(user_id)
-            logger.info(f"Added new user with ID: {user_id}")
-        except Exception as e:
-            logger.error(f"Error adding user {user_id}: {e}")
-
-    user_data = await phdlust.find_one({"_id": user_id})
-    if not user_data:
-        try:
-            await phdlust.insert_one({
-                "_id": user_id,
-                "limit": START_COMMAND_LIMIT,
-                "previous_token": None,
-                "is_premium": False,
-                "token_use_count": 0,  # Initialize token use count
-                "last_token_use_time": None  # Initialize token use time
-            })
-            logger.info(f"User {user_id} added to the database.")
-        except Exception as e:
-            logger.error(f"Error adding user {user_id}: {e}")
-            await message.reply_text("An error occurred while registering you. Please try again later.")
-            return
-
-
-    user_data = await phdlust.find_one({"_id": user_id})
-    user_limit = user_data.get("limit", START_COMMAND_LIMIT)
-    previous_token = user_data.get("previous_token")
-    is_premium = user_data.get("is_premium", False)
-    token_use_count = user_data.get("token_use_count", 0)
-    last_token_use_time = user_data.get("last_token_use_time", None)
-
-
-    if not previous_token:
-        previous_token = str(uuid.uuid4())
-        await phdlust.update_one(
-            {"_id": user_id}, {"$set": {"previous_token": previous_token}}, upsert=True
-        )
-
-
-    verification_link = f"https://t.me/{client.username}?start=verify_{previous_token}"
-    shortened_link = await get_shortlink(SHORTLINK_URL, SHORTLINK_API, verification_link)
-
-
     if len(text) > 7 and "verify_" in text:
         provided_token = text.split("verify_", 1)[1]
-        current_time = datetime.now()
 
         try:
-            if provided_token == previous_token:
-                current_time = datetime.now()
-                if last_token_use_time:
-                    time_diff = current_time - last_token_use_time
+            # Token match, 24h window reset, cap check and credit grant in one atomic update
+            if is_legacy_token(provided_token):
+                user_data, redeemed = await redeem_verify_token(user_id, provided_token)
+            else:
+                try:
+                    # Signature, owner and expiry are checked without touching the database
+                    nonce = read_verify_token(provided_token, user_id)
+                except VerifyTokenError as e:
+                    logger.info(f"Rejected verification token from user {user_id}: {e}")
+                    user_data, redeemed = None, False
                 else:
-                    time_diff = timedelta(days=1)  # First-time use
-
-                # Reset token usage count after 24 hours
-                if time_diff > timedelta(hours=24):
-                    token_use_count = 0
-
+                    user_data, redeemed = await redeem_signed_token(user_id, nonce)
+            if user_data:
                 # Check if the user has exceeded the max token usage
-                if token_use_count >= MAX_TOKEN_USES_PER_DAY:
+                if not redeemed:
                     error_message = await message.reply_text(
                         f"❌ You have already used your verification token {MAX_TOKEN_USES_PER_DAY} times in the past 24 hours. "
                         f"Please try again later or purchase premium for unlimited access."
@@ -124,15 +92,8 @@ async def start_command(client: Client, message: Message):
                     #asyncio.create_task(delete_message_after_delay(error_message, AUTO_DELETE_DELAY))
                     return
 
-
-                await phdlust.update_one(
-                    {"_id": user_id},
-                    {
-                        "$inc": {"limit": CREDIT_INCREMENT, "token_use_count": 1},
-                        "$set": {"last_token_use_time": current_time}
-                    }
-                )
-                logger.info(f"Token used by user {user_id}. New token use count: {token_use_count + 1}")
+                logger.info(f"Token used by user {user_id}.")
+                await log_verification(user_id, first_time=user_data.get("last_token_use_time") is None)
                 confirmation_message = await message.reply_text(
                     f"✅ Your limit has been successfully increased by {CREDIT_INCREMENT} credits! \n"
                     f"Use /check to view your current limit."
@@ -149,7 +110,18 @@ async def start_command(client: Client, message: Message):
             await message.reply_text("An error occurred. Please try again later.")
             return
 
-    if user_limit <= 0:
+    # Registration, credit check, deduction and premium demotion in one round trip
+    try:
+        user_data, consumed, demoted = await open_user_session(user_id)
+    except Exception as e:
+        logger.error(f"Error opening session for user {user_id}: {e}")
+        await message.reply_text("An error occurred while registering you. Please try again later.")
+        return
+
+    if not consumed:
+        # Same token, and so the same cached short link, until it's used or its window ends
+        token = make_verify_token(user_id, user_data["verify_seq"])
+        shortened_link = await get_verification_shortlink(client, token)
         limit_message = (
             "⚠️ Your credit limit has been reached.\n\n"
 	    "🎁 Available Subscription Plans: /plans\n\n"
@@ -165,17 +137,9 @@ async def start_command(client: Client, message: Message):
 	 #   asyncio.create_task(delete_message_after_delay(message, AUTO_DELETE_DELAY))
         return
 
-
-    await phdlust.update_one({"_id": user_id}, {"$inc": {"limit": -1}})
-    #logger.info(f"Deducted 1 credit from user {user_id}. New limit: {user_limit - 1}")
-
-    if is_premium and user_limit - 1 < 20:
-
-        await phdlust.update_one({"_id": user_id}, {"$set": {"is_premium": False}})
-        #logger.info(f"Removed premium status for user {user_id} due to low credits.")
+    if demoted:
         await message.reply("Your premium status has been removed as your credits dropped below 20.")
 
-	
     text = message.text
     if len(text) > 7:
         try:
@@ -183,75 +147,47 @@ async def start_command(client: Client, message: Message):
         except IndexError:
             return
         
-        string = await decode(base64_string)
-        argument = string.split("-")
-        
-        if len(argument) == 3:
-            try:
-                start = int(int(argument[1]) / abs(client.db_channel.id))
-                end = int(int(argument[2]) / abs(client.db_channel.id))
-            except Exception as e:
-                logger.error(f"Error parsing arguments: {e}")
-                return
-            
-            if start <= end:
-                ids = range(start, end + 1)
-            else:
-                ids = list(range(start, end - 1, -1))
-        elif len(argument) == 2:
-            try:
-                ids = [int(int(argument[1]) / abs(client.db_channel.id))]
-            except Exception as e:
-                logger.error(f"Error parsing arguments: {e}")
-                return
+        # Handles manifest links, versioned binary links and legacy "get-..." payloads
+        skipped = []
+        try:
+            source = open_link(client, base64_string, skipped)
+        except LinkError as e:
+            logger.error(f"Error parsing arguments: {e}")
+            return
+        link_popularity.record(base64_string)
         
         temp_msg = await message.reply("Please wait...")
         try:
-            messages = await get_messages(client, ids)
+            # Chunk N+1 is resolved while chunk N is being sent
+            async for posts in prefetch(source):
+                if temp_msg:
+                    await temp_msg.delete()
+                    temp_msg = None
+
+                groups = pack_albums(posts) if ALBUM_DELIVERY else [[post] for post in posts]
+                for group in groups:
+                    try:
+                        if len(group) == 1:
+                            phdlust_send = [await send_scheduler.send(
+                                message.from_user.id, send_post, client, message.from_user.id, group[0]
+                            )]
+                        else:
+                            phdlust_send = await send_scheduler.send(
+                                message.from_user.id, send_album, client, message.from_user.id, group
+                            )
+                        #if AUTO_DELETE:
+                        auto_delete.schedule(message.from_user.id, [msg.id for msg in phdlust_send], AUTO_DELETE_DELAY)
+                    except Exception as e:
+                        logger.error(f"Error copying message: {e}")
+                        skipped.extend(post_id(post) for post in group)
         except Exception as e:
             await message.reply_text("Something went wrong..!")
             logger.error(f"Error getting messages: {e}")
             return
-        await temp_msg.delete()
-	
-        for msg in messages:
-            caption = (
-                CUSTOM_CAPTION.format(
-                    previouscaption="" if not msg.caption else msg.caption.html,
-                    filename=msg.document.file_name
-                )
-                if bool(CUSTOM_CAPTION) and bool(msg.document)
-                else "" if not msg.caption else msg.caption.html
-            )
-        
-            reply_markup = msg.reply_markup if not DISABLE_CHANNEL_BUTTON else None
-        
-            try:
-                phdlust_send = await msg.copy(
-                    chat_id=message.from_user.id,
-                    caption=caption,
-                    parse_mode=ParseMode.HTML,
-                    reply_markup=reply_markup,
-                    protect_content=PROTECT_CONTENT
-                )
-                #if AUTO_DELETE:
-                asyncio.create_task(delete_message_after_delay(phdlust_send, AUTO_DELETE_DELAY))
-                
-                await asyncio.sleep(0.5)
-            except FloodWait as e:
-                await asyncio.sleep(e.x)
-                phdlust_send = await msg.copy(
-                    chat_id=message.from_user.id,
-                    caption=caption,
-                    parse_mode=ParseMode.HTML,
-                    reply_markup=reply_markup,
-                    protect_content=PROTECT_CONTENT
-                )
-                #if AUTO_DELETE:
-                asyncio.create_task(delete_message_after_delay(phdlust_send, AUTO_DELETE_DELAY))
-            except Exception as e:
-                logger.error(f"Error copying message: {e}")
-                pass
+        if temp_msg:
+            await temp_msg.delete()
+        if skipped:
+            await message.reply_text(f"⚠️ {len(skipped)} file(s) couldn't be delivered, please open the link again later.")
         return
     else:
         reply_markup = InlineKeyboardMarkup(
@@ -330,49 +266,18 @@ async def not_joined(client: Client, message: Message):
 @Client.on_message(filters.command('users') & filters.private & filters.user(ADMINS))
 async def get_users(client: Bot, message: Message):
     msg = await client.send_message(chat_id=message.chat.id, text=WAIT_MSG)
-    users = await full_userbase()
-    await msg.edit(f"{len(users)} users are using this bot")
+    users = await count_users()
+    await msg.edit(f"{users} users are using this bot")
 
 @Client.on_message(filters.private & filters.command('broadcast') & filters.user(ADMINS))
 async def send_text(client: Bot, message: Message):
     if message.reply_to_message:
-        query = await full_userbase()
-        broadcast_msg = message.reply_to_message
-        total = 0
-        successful = 0
-        blocked = 0
-        deleted = 0
-        unsuccessful = 0
-        
         pls_wait = await message.reply("<i>Broadcasting Message.. This will Take Some Time</i>")
-        for chat_id in query:
-            try:
-                await broadcast_msg.copy(chat_id)
-                successful += 1
-            except FloodWait as e:
-                await asyncio.sleep(e.x)
-                await broadcast_msg.copy(chat_id)
-                successful += 1
-            except UserIsBlocked:
-                await del_user(chat_id)
-                blocked += 1
-            except InputUserDeactivated:
-                await del_user(chat_id)
-                deleted += 1
-            except:
-                unsuccessful += 1
-                pass
-            total += 1
-        
-        status = f"""<b><u>Broadcast Completed</u>
-
-Total Users: <code>{total}</code>
-Successful: <code>{successful}</code>
-Blocked Users: <code>{blocked}</code>
-Deleted Accounts: <code>{deleted}</code>
-Unsuccessful: <code>{unsuccessful}</code></b>"""
-        
-        return await pls_wait.edit(status)
+        try:
+            # Runs in the background; pls_wait is edited with the progress
+            await broadcaster.start(client, message.reply_to_message, pls_wait)
+        except BroadcastError as e:
+            await pls_wait.edit(f"<b>{e}</b>\nUse /pausebroadcast, /resumebroadcast or /cancelbroadcast.")
 
     else:
         msg = await message.reply(REPLY_ERROR)
@@ -380,3 +285,27 @@ Unsuccessful: <code>{unsuccessful}</code></b>"""
         await msg.delete()
 
 
+@Client.on_message(filters.private & filters.command('pausebroadcast') & filters.user(ADMINS))
+async def pause_broadcast(client: Bot, message: Message):
+    if await broadcaster.pause():
+        await message.reply("<b>Broadcast paused.</b> Use /resumebroadcast to continue.")
+    else:
+        await message.reply("<b>No running broadcast to pause.</b>")
+
+
+@Client.on_message(filters.private & filters.command('resumebroadcast') & filters.user(ADMINS))
+async def resume_broadcast(client: Bot, message: Message):
+    if await broadcaster.resume(client):
+        await message.reply("<b>Broadcast resumed.</b>")
+    else:
+        await message.reply("<b>No paused broadcast to resume.</b>")
+
+
+@Client.on_message(filters.private & filters.command('cancelbroadcast') & filters.user(ADMINS))
+async def cancel_broadcast(client: Bot, message: Message):
+    if await broadcaster.cancel():
+        await message.reply("<b>Broadcast cancelled.</b>")
+    else:
+        await message.reply("<b>No broadcast to cancel.</b>")
+
+
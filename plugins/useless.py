@@ -4,7 +4,9 @@ from pyrogram.types import Message
 from pyrogram import filters
 from config import ADMINS, BOT_STATS_TEXT, USER_REPLY_TEXT
 from datetime import datetime
-from helper_func import get_readable_time
+from helper_func import get_readable_time, delivery_stats
+from database.database import user_cache_stats
+from shortener import shortener
 
 
 @Bot.on_message(filters.command('stats') & filters.user(ADMINS))
@@ -12,7 +14,23 @@ async def stats(bot: Bot, message: Message):
     now = datetime.now()
     delta = now - bot.uptime
     time = get_readable_time(delta.seconds)
-    await message.reply(BOT_STATS_TEXT.format(uptime=time))
+    cache = user_cache_stats()
+    delivery = delivery_stats()
+    shortlinks = shortener.stats()
+    await message.reply(
+        BOT_STATS_TEXT.format(uptime=time)
+        + f"\n\n<b>User cache</b>\n{cache['size']}/{cache['maxsize']} users, "
+        f"{cache['hits']} hits, {cache['misses']} misses ({cache['hit_rate']:.0%})"
+        + f"\n\n<b>Post cache</b>\n{delivery['posts']['size']} posts, {delivery['posts']['bytes'] // 1024} KiB, "
+        f"{delivery['posts']['hit_rate']:.0%} hits"
+        + f"\n\n<b>Coalesced lookups</b>\n{delivery['flights']['coalesced']} of "
+        f"{delivery['flights']['calls'] + delivery['flights']['coalesced']} requests"
+        + f"\n\n<b>Shorteners</b> ({shortlinks['hedges']} hedged)\n"
+        + "\n".join(
+            f"{name}: {provider['calls']} calls, {provider['failures']} failed, hedge after {provider['hedge_delay']}s"
+            for name, provider in shortlinks["providers"].items()
+        )
+    )
 
 
 @Bot.on_message(filters.private & filters.incoming)
@@ -0,0 +1,190 @@
+# Link popularity tracking.
+#
+# Every open of a link updates a Count-Min Sketch (fixed memory, never
+# under-counts) and a top-K table fed from the sketch's estimates, so the hot
+# set is known without a database write per open. Raw hits are buffered and
+# flushed periodically as one unordered bulk of $inc upserts into link_stats.
+# Counters decay by half every DECAY_INTERVAL so "top" means trending, not
+# all-time. After each flush the first chunk of every trending link is
+# resolved again, which keeps its posts warm in the post and manifest caches.
+
+import asyncio
+import hashlib
+import heapq
+import time
+from array import array
+from collections import Counter
+from config import LOGGER, POPULARITY_FLUSH_INTERVAL, PREWARM_TOP_LINKS
+from database.links import add_link_hits
+from helper_func import open_link
+
+logger = LOGGER(__name__)
+
+DECAY_INTERVAL = 3600
+
+
+class CountMinSketch:
+
+    def __init__(self, width=4096, depth=4):
+        self.width = width
+        self.depth = depth
+        self.rows = [array("L", [0]) * width for _ in range(depth)]
+
+    def _indexes(self, key):
+        # Double hashing: depth indexes out of one 128-bit digest
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.width for i in range(self.depth)]
+
+    def add(self, key, count=1):
+        """Adds count to key and returns its new estimate."""
+
+        estimate = None
+        for row, index in zip(self.rows, self._indexes(key)):
+            row[index] += count
+            if estimate is None or row[index] < estimate:
+                estimate = row[index]
+        return estimate
+
+    def estimate(self, key):
+        return min(row[index] for row, index in zip(self.rows, self._indexes(key)))
+
+    def decay(self):
+        for row in self.rows:
+            for index, value in enumerate(row):
+                if value:
+                    row[index] = value >> 1
+
+
+class TopK:
+    """The k keys with the highest counts. The heap holds (count, key) entries
+    and stale ones are skipped lazily instead of being searched for."""
+
+    def __init__(self, k=100):
+        self.k = k
+        self.counts = {}
+        self._heap = []
+
+    def __len__(self):
+        return len(self.counts)
+
+    def _min(self):
+        while self._heap:
+            count, key = self._heap[0]
+            if self.counts.get(key) == count:
+                return count, key
+            heapq.heappop(self._heap)
+        return None
+
+    def offer(self, key, count):
+        if key not in self.counts:
+            if len(self.counts) >= self.k:
+                smallest = self._min()
+                if smallest is None or count <= smallest[0]:
+                    return
+                heapq.heappop(self._heap)
+                del self.counts[smallest[1]]
+        elif self.counts[key] == count:
+            return
+        self.counts[key] = count
+        heapq.heappush(self._heap, (count, key))
+        if len(self._heap) > 4 * self.k:
+            self._rebuild()
+
+    def _rebuild(self):
+        self._heap = [(count, key) for key, count in self.counts.items()]
+        heapq.heapify(self._heap)
+
+    def decay(self):
+        self.counts = {key: count >> 1 for key, count in self.counts.items() if count > 1}
+        self._rebuild()
+
+    def items(self, n=None):
+        return heapq.nlargest(n or self.k, self.counts.items(), key=lambda item: item[1])
+
+
+class LinkPopularity:
+
+    def __init__(self, flush_interval=POPULARITY_FLUSH_INTERVAL, prewarm=PREWARM_TOP_LINKS, k=100):
+        self.flush_interval = flush_interval
+        self.prewarm_count = prewarm
+        self.sketch = CountMinSketch()
+        self.top_links = TopK(k)
+        self._pending = Counter()
+        self._decayed_at = time.monotonic()
+        self._client = None
+        self._task = None
+        self.opens = 0
+
+    def record(self, payload):
+        """Counts one open of payload. Memory only, the hit reaches MongoDB with
+        the next flush."""
+
+        self.opens += 1
+        self._pending[payload] += 1
+        self.top_links.offer(payload, self.sketch.add(payload))
+
+    def top(self, n=10):
+        """[(payload, estimated recent opens)] for the n most opened links."""
+
+        return self.top_links.items(n)
+
+    async def start(self, client):
+        self._client = client
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    async def flush(self):
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, Counter()
+        try:
+            await add_link_hits(pending)
+        except Exception as e:
+            # Keep the hits for the next flush instead of losing them
+            self._pending.update(pending)
+            logger.error(f"Could not flush hit counters for {len(pending)} links: {e}")
+
+    async def prewarm(self):
+        for payload, _ in self.top(self.prewarm_count):
+            try:
+                source = open_link(self._client, payload)
+                try:
+                    # The first chunk is what a user waits for, the rest is prefetched while sending
+                    async for _ in source:
+                        break
+                finally:
+                    await source.aclose()
+            except Exception as e:
+                logger.debug(f"Could not prewarm link {payload}: {e}")
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+            if time.monotonic() - self._decayed_at >= DECAY_INTERVAL:
+                self.sketch.decay()
+                self.top_links.decay()
+                self._decayed_at = time.monotonic()
+            if self._client is not None:
+                await self.prewarm()
+
+    def stats(self):
+        return {
+            "opens": self.opens,
+            "tracked": len(self.top_links),
+            "pending": len(self._pending)
+        }
+
+
+link_popularity = LinkPopularity()
@@ -0,0 +1,132 @@
+# Outbound send scheduler.
+#
+# Every send goes through a global token bucket and a per-chat token bucket.
+# Rates adapt to Telegram's feedback (AIMD): each successful send nudges the
+# rates up additively, each FloodWait halves them and pauses the chat for the
+# time Telegram asked for. Callers get the highest throughput Telegram accepts
+# without fixed sleeps between messages.
+
+import asyncio
+import time
+from collections import OrderedDict
+from pyrogram.errors import FloodWait
+from config import LOGGER, SEND_RATE_GLOBAL, SEND_RATE_PER_CHAT, SEND_BURST_PER_CHAT
+
+logger = LOGGER(__name__)
+
+
+class TokenBucket:
+
+    def __init__(self, rate, capacity, min_rate=None, max_rate=None, increase=None):
+        self.rate = rate
+        self.capacity = capacity
+        self.min_rate = min_rate or rate / 8
+        self.max_rate = max_rate or rate * 4
+        self.increase = increase or rate / 20
+        self.tokens = capacity
+        self.blocked_until = 0.0
+        self._updated = time.monotonic()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self, now):
+        """Seconds until a token is available (0 if one is available now)."""
+        self._refill(now)
+        if now < self.blocked_until:
+            return self.blocked_until - now
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def take(self):
+        self.tokens -= 1
+
+    def is_idle(self, now):
+        self._refill(now)
+        return now >= self.blocked_until and self.tokens >= self.capacity
+
+    def reward(self):
+        self.rate = min(self.max_rate, self.rate + self.increase)
+
+    def penalize(self, pause=0):
+        self.rate = max(self.min_rate, self.rate / 2)
+        self.tokens = 0
+        if pause:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + pause)
+
+
+class SendScheduler:
+
+    def __init__(self, global_rate=SEND_RATE_GLOBAL, chat_rate=SEND_RATE_PER_CHAT,
+                 chat_burst=SEND_BURST_PER_CHAT, max_retries=3, max_chats=10000):
+        self.global_bucket = TokenBucket(global_rate, capacity=global_rate, max_rate=global_rate)
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.max_retries = max_retries
+        self.max_chats = max_chats
+        self._chats = OrderedDict()
+        self.sent = 0
+        self.flood_waits = 0
+
+    def _chat_bucket(self, chat_id):
+        bucket = self._chats.get(chat_id)
+        if bucket is None:
+            bucket = self._chats[chat_id] = TokenBucket(self.chat_rate, capacity=self.chat_burst)
+            if len(self._chats) > self.max_chats:
+                self._prune()
+        self._chats.move_to_end(chat_id)
+        return bucket
+
+    def _prune(self):
+        # A full, unblocked bucket is indistinguishable from a fresh one
+        now = time.monotonic()
+        for chat_id in list(self._chats):
+            if len(self._chats) <= self.max_chats:
+                break
+            if self._chats[chat_id].is_idle(now):
+                del self._chats[chat_id]
+
+    async def acquire(self, chat_id):
+        bucket = self._chat_bucket(chat_id)
+        while True:
+            now = time.monotonic()
+            delay = max(self.global_bucket.wait_time(now), bucket.wait_time(now))
+            if delay <= 0:
+                self.global_bucket.take()
+                bucket.take()
+                return
+            await asyncio.sleep(delay)
+
+    async def send(self, chat_id, func, *args, **kwargs):
+        """Awaits func(*args, **kwargs) once both buckets allow a send to chat_id,
+        retrying on FloodWait up to max_retries times."""
+
+        for attempt in range(self.max_retries + 1):
+            await self.acquire(chat_id)
+            try:
+                result = await func(*args, **kwargs)
+            except FloodWait as e:
+                self.flood_waits += 1
+                self._chat_bucket(chat_id).penalize(pause=e.value)
+                self.global_bucket.penalize()
+                logger.warning(f"FloodWait of {e.value}s sending to {chat_id} (attempt {attempt + 1})")
+                if attempt == self.max_retries:
+                    raise
+                continue
+            self.sent += 1
+            self._chat_bucket(chat_id).reward()
+            self.global_bucket.reward()
+            return result
+
+    def stats(self):
+        return {
+            "sent": self.sent,
+            "flood_waits": self.flood_waits,
+            "global_rate": round(self.global_bucket.rate, 2),
+            "chats": len(self._chats)
+        }
+
+
+send_scheduler = SendScheduler()
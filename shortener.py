@@ -0,0 +1,210 @@
+# Short link client.
+#
+# All providers share one pooled aiohttp session and every call has a hard
+# deadline. Providers are tried in the configured order: if the first one has
+# not answered by its usual latency (a percentile of its recent calls), a
+# hedged request is sent to the next one and whichever answers first wins.
+# A failing provider hands over to the next one immediately.
+
+import abc
+import asyncio
+import hashlib
+import time
+from collections import deque
+import aiohttp
+from config import LOGGER, SHORTLINK_PROVIDERS, SHORTLINK_TIMEOUT, SHORTLINK_HEDGE_PERCENTILE
+
+logger = LOGGER(__name__)
+
+
+class ShortenerError(Exception):
+    pass
+
+
+class Provider(abc.ABC):
+    """Base provider: keeps a window of recent latencies to decide when to hedge."""
+
+    name = "provider"
+
+    def __init__(self, window=100, default_delay=1.0, min_delay=0.05):
+        self.latencies = deque(maxlen=window)
+        self.default_delay = default_delay
+        self.min_delay = min_delay
+        self.calls = 0
+        self.failures = 0
+
+    def record(self, latency):
+        self.latencies.append(latency)
+
+    def hedge_delay(self, percentile=SHORTLINK_HEDGE_PERCENTILE):
+        if len(self.latencies) < 10:
+            return self.default_delay
+        ordered = sorted(self.latencies)
+        index = min(len(ordered) - 1, int(len(ordered) * percentile / 100))
+        return max(self.min_delay, ordered[index])
+
+    @abc.abstractmethod
+    async def shorten(self, session, link):
+        """Returns the short URL for link or raises."""
+
+
+class HTTPProvider(Provider):
+    """Shortener reachable over HTTP. Supports the shareus.io "easy_api"
+    (plain-text response) and the common `/api?api=&url=` JSON API."""
+
+    def __init__(self, site, api_key, **kwargs):
+        super().__init__(**kwargs)
+        self.site = site
+        self.api_key = api_key
+        self.name = site
+
+    async def shorten(self, session, link):
+        if "shareus" in self.site:
+            url = f"https://{self.site}/easy_api"
+            params = {"key": self.api_key, "link": link}
+        else:
+            url = f"https://{self.site}/api"
+            params = {"api": self.api_key, "url": link}
+
+        async with session.get(url, params=params) as response:
+            response.raise_for_status()
+            if "shareus" in self.site:
+                short = (await response.text()).strip()
+            else:
+                data = await response.json(content_type=None)
+                if data.get("status") == "error":
+                    raise ShortenerError(f"{self.site}: {data.get('message')}")
+                short = data.get("shortenedUrl")
+        if not short or not short.startswith("http"):
+            raise ShortenerError(f"{self.site} returned an invalid short link: {short!r}")
+        return short
+
+
+class LocalProvider(Provider):
+    """In-process stand-in for tests and benchmarks. Returns a deterministic
+    fake short URL after `delay` seconds, and fails every `fail_every` calls."""
+
+    def __init__(self, name="local", delay=0.0, fail_every=0, **kwargs):
+        super().__init__(**kwargs)
+        self.name = name
+        self.delay = delay
+        self.fail_every = fail_every
+
+    async def shorten(self, session, link):
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        if self.fail_every and self.calls % self.fail_every == 0:
+            raise ShortenerError(f"{self.name}: simulated failure")
+        digest = hashlib.sha1(link.encode()).hexdigest()[:8]
+        return f"https://{self.name}.invalid/{digest}"
+
+
+def providers_from_config(spec=SHORTLINK_PROVIDERS):
+    """Parses "site|api_key site2|api_key2"; the site "local" gives a LocalProvider."""
+
+    providers = []
+    for entry in spec.split():
+        site, _, api_key = entry.partition("|")
+        if site == "local":
+            providers.append(LocalProvider())
+        else:
+            providers.append(HTTPProvider(site, api_key))
+    return providers
+
+
+class ShortenerClient:
+
+    def __init__(self, providers=None, timeout=SHORTLINK_TIMEOUT):
+        self.providers = providers if providers is not None else providers_from_config()
+        self.timeout = timeout
+        self._session = None
+        self.hedges = 0
+
+    def _get_session(self):
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=100, ttl_dns_cache=300),
+                timeout=aiohttp.ClientTimeout(total=self.timeout)
+            )
+        return self._session
+
+    async def close(self):
+        if self._session and not self._session.closed:
+            await self._session.close()
+
+    async def _call(self, provider, link):
+        provider.calls += 1
+        started = time.monotonic()
+        try:
+            short = await provider.shorten(self._get_session(), link)
+        except Exception:
+            provider.failures += 1
+            raise
+        provider.record(time.monotonic() - started)
+        return short
+
+    async def shorten(self, link):
+        """Returns a short URL for link, or raises ShortenerError if no provider
+        answered successfully before the deadline."""
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.timeout
+        waiting = deque(self.providers)
+        tasks = {}
+        errors = []
+
+        def launch():
+            # Returns when to hedge to the next provider, or None if there is none
+            provider = waiting.popleft()
+            tasks[asyncio.ensure_future(self._call(provider, link))] = provider
+            return loop.time() + provider.hedge_delay() if waiting else None
+
+        if not waiting:
+            raise ShortenerError("no shortener configured")
+
+        hedge_at = launch()
+        try:
+            while tasks:
+                now = loop.time()
+                if now >= deadline:
+                    break
+                timeout = deadline - now
+                if hedge_at is not None:
+                    timeout = min(timeout, max(0, hedge_at - now))
+
+                done, _ = await asyncio.wait(set(tasks), timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                failed = False
+                for task in done:
+                    provider = tasks.pop(task)
+                    if task.exception() is None:
+                        return task.result()
+                    failed = True
+                    errors.append(f"{provider.name}: {task.exception()!r}")
+
+                if hedge_at is not None and (failed or loop.time() >= hedge_at):
+                    if not failed:
+                        self.hedges += 1
+                    hedge_at = launch()
+        finally:
+            for task in tasks:
+                task.cancel()
+
+        if not errors:
+            errors.append(f"no answer within {self.timeout}s")
+        raise ShortenerError("; ".join(errors))
+
+    def stats(self):
+        return {
+            "hedges": self.hedges,
+            "providers": {
+                provider.name: {
+                    "calls": provider.calls,
+                    "failures": provider.failures,
+                    "hedge_delay": round(provider.hedge_delay(), 3)
+                }
+                for provider in self.providers
+            }
+        }
+
+
+shortener = ShortenerClient()
@@ -0,0 +1,43 @@
+# Request coalescing.
+#
+# Concurrent callers asking for the same key share one in-flight call and all
+# receive its result (or its exception). A caller that gets cancelled doesn't
+# cancel the shared call for the others.
+
+import asyncio
+
+
+class SingleFlight:
+
+    def __init__(self):
+        self._in_flight = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    def __len__(self):
+        return len(self._in_flight)
+
+    async def do(self, key, func, *args, **kwargs):
+        future = self._in_flight.get(key)
+        if future is not None:
+            self.coalesced += 1
+        else:
+            self.calls += 1
+            future = asyncio.ensure_future(func(*args, **kwargs))
+            self._in_flight[key] = future
+            future.add_done_callback(lambda done: self._finish(key, done))
+        return await asyncio.shield(future)
+
+    def _finish(self, key, future):
+        if self._in_flight.get(key) is future:
+            del self._in_flight[key]
+        if not future.cancelled():
+            # Mark the exception as retrieved in case every waiter went away
+            future.exception()
+
+    def stats(self):
+        return {
+            "calls": self.calls,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._in_flight)
+        }